@@ -1 +1,30 @@
-from .api import VisionCraftClient
\ No newline at end of file
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .api import VisionCraftClient
+    from .key_pool import VisionCraftKeyPool
+    from .sync_client import SyncVisionCraftClient
+
+# The clients are imported on first access, so that importing the package doesn't load aiohttp
+_MODULES = {
+    "VisionCraftClient": "api",
+    "VisionCraftKeyPool": "key_pool",
+    "SyncVisionCraftClient": "sync_client"
+}
+
+__all__ = [
+    "VisionCraftClient",
+    "VisionCraftKeyPool",
+    "SyncVisionCraftClient"
+]
+
+def __getattr__(name: str):
+    if name not in _MODULES:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    value = getattr(import_module(f'.{_MODULES[name]}', __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_MODULES})
\ No newline at end of file
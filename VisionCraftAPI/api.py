@@ -1,14 +1,48 @@
-import base64
+import os
+import copy
+import time
+import hashlib
+import asyncio
 
-from json import loads
-from typing import Optional
+from json import dumps
+from pathlib import Path
+from contextlib import aclosing
+from typing import TYPE_CHECKING, AsyncIterable, AsyncIterator, Iterable, Optional
 
 from .http_client import HTTPClient
-from .models import (MidjourneyTask,
-                     MidjourneyResult,
-                     LLMAnswer,
-                     WhisperResult,
-                     Tiers)
+from .enums import ModelFamily
+from .exceptions import RateLimitExceeded
+from .utils import (RateLimiter,
+                    RetryPolicy,
+                    MidjourneyPoller,
+                    LLMStream,
+                    TTLCache,
+                    SingleFlight,
+                    DiskCache,
+                    Base64JSONPayload,
+                    ResultDownloader,
+                    BatchResult,
+                    PipelineItem,
+                    RequestScheduler,
+                    AdaptiveLimiter,
+                    Tracer,
+                    JSONCodec,
+                    Offloader,
+                    MidjourneyJournal,
+                    ImagePreprocessor,
+                    run_batch,
+                    image_pipeline)
+from .utils.uploads import Media, is_inline
+from .utils.task_poller import is_finished
+from .utils.audio import AudioWindow, split_wav, merge_whisper_results
+from . import models
+
+if TYPE_CHECKING:
+    from .models import (MidjourneyTask,
+                         MidjourneyResult,
+                         LLMAnswer,
+                         WhisperResult,
+                         Tiers)
 
 class VisionCraftClient(HTTPClient):
     """
@@ -17,31 +51,253 @@ class VisionCraftClient(HTTPClient):
     API Docs: https://docs.visioncraft.top/
     SDK Docs: https://vision.b2k.tech/
     
+    Use ``async with client:`` (or ``start()``/``close()``) to keep a pooled
+    connection alive between calls instead of opening a new one per request.
+    
     :param api_key: Your VisionCraft API key (you can get it from https://t.me/VisionCraft_bot)
+    :param connection_limit: Total number of simultaneous connections in the pool (0 for no limit)
+    :param connection_limit_per_host: Number of simultaneous connections to one host (0 for no limit)
+    :param keepalive_timeout: How long to keep idle connections alive, in seconds
+    :param dns_cache_ttl: How long to cache resolved DNS records, in seconds
+    :param rate_limiter: A RateLimiter queueing calls locally per model family (see ``configure_rate_limiter``)
+    :param retry_policy: A RetryPolicy for failed requests (GET requests and ``get_midjourney_task`` are retried by default)
+    :param catalog_ttl: How long to cache models, samplers, LORAs, schedulers, refiners and limits, in seconds (None to disable)
+    :param coalesce: Share one request between concurrent identical calls (same endpoint and payload, regardless of the token) of deterministic endpoints: ``whisper``, ``image_upscaling`` and ``llm_chatting`` with a temperature of 0
+    :param disk_cache: A DiskCache for ``whisper`` and ``image_upscaling`` results of uploaded media and for catalog responses (kept for ``catalog_ttl``)
+    :param scheduler: A RequestScheduler with per-endpoint concurrency limits, priority classes and fair queuing across tenants
+    :param tracer: A Tracer passing request timelines and retry/rate-limit events to hooks such as a MetricsRegistry
+    :param json_codec: A JSONCodec for request and response bodies (orjson or msgspec if installed, otherwise stdlib ``json``)
+    :param offload: An Offloader moving base64 encoding and hashing of large uploads and parsing of large JSON responses to an executor
+    :param journal: A MidjourneyJournal recording submitted Midjourney tasks and their results, to resume them after a restart
+    :param concurrency_limiter: An AdaptiveLimiter growing and cutting the number of requests in flight per endpoint (AIMD)
+    :param image_preprocessor: An ImagePreprocessor downsizing and re-encoding images uploaded by ``image2image`` and ``image_upscaling``
     """
     
     API_HOST = 'https://api.visioncraft.top'
+    BATCH_METHODS = frozenset({
+        'generate_image',
+        'generate_xl_image',
+        'image2image',
+        'image_upscaling',
+        'generate_gif'
+    })
+    CATALOG_ENDPOINTS = (
+        '/models',
+        '/models-xl',
+        '/models-llm',
+        '/models-upscale',
+        '/samplers',
+        '/samplers-xl',
+        '/loras',
+        '/loras-xl',
+        '/limits',
+        '/img2img/schedulers',
+        '/img2img/refiners'
+    )
     
     def __init__(self, 
-                 api_key: str) -> None:
-        super().__init__()
+                 api_key: str,
+                 connection_limit: int = 100,
+                 connection_limit_per_host: int = 0,
+                 keepalive_timeout: float = 30,
+                 dns_cache_ttl: int = 300,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 catalog_ttl: Optional[float] = None,
+                 coalesce: bool = False,
+                 disk_cache: Optional[DiskCache] = None,
+                 scheduler: Optional[RequestScheduler] = None,
+                 tracer: Optional[Tracer] = None,
+                 json_codec: Optional[JSONCodec] = None,
+                 offload: Optional[Offloader] = None,
+                 journal: Optional[MidjourneyJournal] = None,
+                 concurrency_limiter: Optional[AdaptiveLimiter] = None,
+                 image_preprocessor: Optional[ImagePreprocessor] = None) -> None:
+        super().__init__(connection_limit=connection_limit,
+                         connection_limit_per_host=connection_limit_per_host,
+                         keepalive_timeout=keepalive_timeout,
+                         dns_cache_ttl=dns_cache_ttl,
+                         retry_policy=retry_policy,
+                         scheduler=scheduler,
+                         tracer=tracer,
+                         json_codec=json_codec,
+                         offload=offload,
+                         concurrency_limiter=concurrency_limiter)
         self.__api_key = api_key
+        self.rate_limiter = rate_limiter
+        self.midjourney_poller: Optional[MidjourneyPoller] = None
+        self.__catalog_cache = TTLCache(catalog_ttl) if catalog_ttl else None
+        self.__in_flight = SingleFlight() if coalesce else None
+        self.__catalog_ttl = catalog_ttl
+        self.disk_cache = disk_cache
+        self.journal = journal
+        self.image_preprocessor = image_preprocessor
+        self.__claimed_tasks: set[int] = set()
         
     @property
     def api_key(self) -> str:
         return self.__api_key
     
+    def _share_caches(self,
+                      client: "VisionCraftClient") -> None:
+        """Use the catalog cache and the in-flight calls of another client (see VisionCraftKeyPool)."""
+        self.__catalog_cache = client.__catalog_cache
+        self.__in_flight = client.__in_flight
+    
+    async def configure_rate_limiter(self,
+                                     tier: str = 'FREE') -> RateLimiter:
+        """
+        Configure the client-side rate limiter from the limits of your tier.
+        
+        :param tier: A tier name (FREE, TIER_1 or TIER_2)
+        
+        :return: A RateLimiter object
+        """
+        self.rate_limiter = RateLimiter.from_tiers(await self.get_limits(), tier)
+        return self.rate_limiter
+    
     async def __get(self, 
                   url: str) -> dict | str | list:
-        return await self._request(method="GET",
-                                   url=url)
+        if self.__catalog_cache is None:
+            return await self._request(method="GET",
+                                       url=url)
+        result = await self.__catalog_cache.get(url, lambda: self.__get_catalog(url))
+        return copy.deepcopy(result)
+    
+    async def __get_catalog(self,
+                            url: str) -> dict | str | list:
+        if self.disk_cache is None:
+            return await self._request(method="GET",
+                                       url=url)
+        key = f'catalog:{url}'
+        cached = await asyncio.to_thread(self.disk_cache.get, key, self.__catalog_ttl)
+        if cached is not None:
+            return self.json_codec.decode(cached)
+        result = await self._request(method="GET",
+                                     url=url)
+        await asyncio.to_thread(self.disk_cache.set, key, self.json_codec.encode(result))
+        return result
+    
+    async def __disk_key(self,
+                         prefix: str,
+                         body: dict) -> Optional[str]:
+        if self.disk_cache is None or "data" not in body:
+            return None
+        return f'{prefix}:{await body["data"].prepare_fingerprint()}'
+    
+    async def invalidate_cache(self,
+                               endpoint: Optional[str] = None) -> None:
+        """
+        Drop cached catalog responses, from memory and from the disk cache.
+        
+        :param endpoint: An endpoint path like "/models" (None to drop everything)
+        """
+        if self.__catalog_cache is not None:
+            self.__catalog_cache.invalidate(None if endpoint is None else f'{self.API_HOST}{endpoint}')
+        if self.disk_cache is None:
+            return
+        endpoints = self.CATALOG_ENDPOINTS if endpoint is None else (endpoint,)
+        keys = [f'catalog:{self.API_HOST}{path}' for path in endpoints]
+        
+        def delete() -> None:
+            for key in keys:
+                self.disk_cache.delete(key)
+        
+        await asyncio.to_thread(delete)
 
     async def __post(self,
                    url: str,
+                   family: Optional[ModelFamily] = None,
+                   coalesce: bool = False,
                    **kwargs) -> dict | str | list:
-        return await self._request(method="POST",
-                                   url=url,
-                                   **kwargs)
+        if self.__in_flight is None or not coalesce:
+            return await self.__limited_post(url, family, **kwargs)
+        if "data" in kwargs:
+            await kwargs["data"].prepare_fingerprint()
+        key = self.__coalescing_key(url, **kwargs)
+        result = await self.__in_flight.run(key, lambda: self.__limited_post(url, family, **kwargs))
+        return copy.deepcopy(result)
+    
+    def __coalescing_key(self,
+                         url: str,
+                         json: Optional[dict] = None,
+                         data: Optional[Base64JSONPayload] = None,
+                         **kwargs) -> str:
+        if data is not None:
+            return f'{url}:{data.fingerprint()}'
+        fields = {key: value for key, value in (json or {}).items() if key != "token"}
+        payload = dumps(fields, sort_keys=True, default=str).encode('utf-8')
+        return f'{url}:{hashlib.sha256(payload).hexdigest()}'
+    
+    async def __limited_post(self,
+                           url: str,
+                           family: Optional[ModelFamily] = None,
+                           **kwargs) -> dict | str | list:
+        if family is None or self.rate_limiter is None:
+            return await self._request(method="POST",
+                                       url=url,
+                                       **kwargs)
+        await self.__throttle(url, family)
+        try:
+            return await self._request(method="POST",
+                                       url=url,
+                                       **kwargs)
+        except RateLimitExceeded as e:
+            self.rate_limiter.penalize(family, e.retry_after)
+            raise
+    
+    async def __throttle(self,
+                         url: str,
+                         family: ModelFamily) -> None:
+        if self.tracer is None:
+            await self.rate_limiter.acquire(family)
+            return
+        start = time.monotonic()
+        await self.rate_limiter.acquire(family)
+        waited = time.monotonic() - start
+        if waited > 0.001:
+            self.tracer.event('rate_limit_wait', url,
+                              family=family,
+                              waited=waited)
+    
+    async def __stream_post(self,
+                          url: str,
+                          family: ModelFamily,
+                          **kwargs) -> AsyncIterator[dict]:
+        if self.rate_limiter is not None:
+            await self.__throttle(url, family)
+        try:
+            async for event in self._stream(method="POST",
+                                            url=url,
+                                            **kwargs):
+                yield event
+        except RateLimitExceeded as e:
+            if self.rate_limiter is not None:
+                self.rate_limiter.penalize(family, e.retry_after)
+            raise
+    
+    async def __preprocess(self,
+                           image: Media,
+                           url: str) -> Media:
+        if self.image_preprocessor is None or not is_inline(image):
+            return image
+        image, report = await self.image_preprocessor.prepare(image, self.offload)
+        if report is not None and self.tracer is not None:
+            self.tracer.event('preprocess', url,
+                              original_size=report.original_size,
+                              size=report.size,
+                              bytes_saved=report.bytes_saved)
+        return image
+        
+    def __media_body(self,
+                     json: dict,
+                     field: str) -> dict:
+        if not is_inline(json[field]):
+            return {"json": json}
+        data = {key: value for key, value in json.items() if key != field}
+        return {"data": Base64JSONPayload(data, field, json[field],
+                                          codec=self.json_codec,
+                                          offload=self.offload)}
     
     async def get_models(self) -> list:
         """
@@ -131,7 +387,7 @@ class VisionCraftClient(HTTPClient):
         """
         return await self.__get(f'{self.API_HOST}/loras-xl')
     
-    async def get_limits(self) -> Tiers:
+    async def get_limits(self) -> "Tiers":
         """
         Get info about rate limits for free users.
         
@@ -141,7 +397,7 @@ class VisionCraftClient(HTTPClient):
         :return: A Tiers object
         """
         
-        limits: dict = loads(await self.__get(f'{self.API_HOST}/limits'))
+        limits: dict = self.json_codec.decode(await self.__get(f'{self.API_HOST}/limits'))
         
         new_keys = {
             "Free Tier": "FREE",
@@ -155,14 +411,14 @@ class VisionCraftClient(HTTPClient):
         
         new_data = dict()
         
-        for tier, models in limits.items():
+        for tier, tier_limits in limits.items():
             new_data[new_keys[tier]] = {}
-            for model, limit in models.items():
+            for model, limit in tier_limits.items():
                 if model in new_keys:
                     new_data[new_keys[tier]][new_keys[model]] = limit
                 else:
                     new_data[new_keys[tier]][model.upper()] = limit           
-        return Tiers(**new_data)
+        return models.Tiers(**new_data)
     
     async def get_i2i_schedulers(self) -> list:
         """
@@ -233,7 +489,9 @@ class VisionCraftClient(HTTPClient):
             "upscale": upscale
         }
         
-        result = await self.__post(f'{self.API_HOST}/generate', json=json)
+        result = await self.__post(f'{self.API_HOST}/generate',
+                                   family=ModelFamily.STABLEDIFFUSION,
+                                   json=json)
         return result["images"]
     
     async def generate_xl_image(self,
@@ -281,32 +539,86 @@ class VisionCraftClient(HTTPClient):
             "loras": loras
         }
         
-        result = await self.__post(f'{self.API_HOST}/generate-xl', json=json)
+        result = await self.__post(f'{self.API_HOST}/generate-xl',
+                                   family=ModelFamily.STABLEDIFFUSIONXL,
+                                   json=json)
         return result['images']
         
     async def create_midjourney_task(self,
-                                     prompt: str) -> MidjourneyTask:
+                                     prompt: str) -> "MidjourneyTask":
         """
         Create a Midjourney image generation task.
         
         API Docs: https://docs.visioncraft.top/interacting-with-the-api/midjourney/create-task
         SDK Docs: https://vision.b2k.tech/docs/api-methods/midjourney/create_midjourney_task
         
+        With a journal, a pending task with the same prompt submitted before a restart
+        (and not returned by this client yet) is returned instead of a new one.
+        
         :param prompt: A text prompt for image generation
         
         :return: A MidjourneyTask object
         """
         
+        task = await self.claim_pending(prompt)
+        if task is not None:
+            return task
+        
         json = {
             "prompt": prompt,
             "token": self.api_key
         }
         
-        result = await self.__post(f'{self.API_HOST}/midjourney', json=json)
-        return MidjourneyTask(**result)
+        result = await self.__post(f'{self.API_HOST}/midjourney',
+                                   family=ModelFamily.MIDJOURNEY,
+                                   json=json)
+        task = models.MidjourneyTask(**result)
+        if self.journal is not None:
+            self.__claimed_tasks.add(task.data)
+            await asyncio.to_thread(self.journal.record_submitted, task.data, prompt, self.api_key)
+        return task
+    
+    async def claim_pending(self,
+                            prompt: str) -> Optional["MidjourneyTask"]:
+        """
+        Get a pending journal task created with this key and a prompt before a restart,
+        if this client hasn't returned it yet.
+        
+        :param prompt: A text prompt for image generation
+        
+        :return: A MidjourneyTask object (None if there is no such task or no journal)
+        """
+        
+        if self.journal is None:
+            return None
+        entry = await asyncio.to_thread(self.journal.find_pending,
+                                        prompt,
+                                        self.api_key,
+                                        tuple(self.__claimed_tasks))
+        if entry is None or entry.task_id in self.__claimed_tasks:
+            return None
+        self.__claimed_tasks.add(entry.task_id)
+        return models.MidjourneyTask(statusCode=200,
+                                     message='Resumed from the journal',
+                                     data=entry.task_id)
+    
+    async def claim_pending_tasks(self) -> list[int]:
+        """
+        Get the IDs of all pending journal tasks created with this key, and mark them as
+        returned (``create_midjourney_task`` won't resume them again).
+        
+        :return: A list of task IDs in submission order
+        """
+        
+        if self.journal is None:
+            raise ValueError('The client has no journal')
+        entries = await asyncio.to_thread(self.journal.pending, self.api_key)
+        task_ids = [entry.task_id for entry in entries]
+        self.__claimed_tasks.update(task_ids)
+        return task_ids
     
     async def get_midjourney_task(self,
-                                  task_id: int) -> MidjourneyResult:
+                                  task_id: int) -> "MidjourneyResult":
         """
         Get the result of a Midjourney image generation task.
         
@@ -323,11 +635,97 @@ class VisionCraftClient(HTTPClient):
             "token": self.api_key
         }
         
-        result = await self.__post(f'{self.API_HOST}/midjourney/result', json=json)
-        return MidjourneyResult(**result)
+        result = await self.__post(f'{self.API_HOST}/midjourney/result',
+                                   idempotent=True,
+                                   json=json)
+        result = models.MidjourneyResult(**result)
+        if self.journal is not None and is_finished(result):
+            await asyncio.to_thread(self.journal.record_result, task_id, result)
+        return result
+    
+    def __get_poller(self) -> MidjourneyPoller:
+        if self.midjourney_poller is None:
+            self.midjourney_poller = MidjourneyPoller(self.get_midjourney_task)
+        return self.midjourney_poller
+    
+    async def wait_midjourney_task(self,
+                                   task_id: int,
+                                   timeout: Optional[float] = None) -> "MidjourneyResult":
+        """
+        Wait until a Midjourney image generation task is finished.
+        
+        All waiting tasks are polled by one shared MidjourneyPoller (``client.midjourney_poller``)
+        with adaptive intervals and bounded concurrency.
+        
+        :param task_id: The ID of the task
+        :param timeout: Maximum time to wait, in seconds (raises asyncio.TimeoutError)
+        
+        :return: A MidjourneyResult object
+        """
+        
+        if self.journal is not None:
+            entry = await asyncio.to_thread(self.journal.get, task_id)
+            if entry is not None and not entry.pending:
+                return entry.result
+        
+        poller = self.__get_poller()
+        future = poller.watch(task_id)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        finally:
+            poller.unwatch(task_id)
+    
+    async def as_completed(self,
+                           task_ids: Iterable[int],
+                           timeout: Optional[float] = None) -> AsyncIterator["MidjourneyResult"]:
+        """
+        Iterate over the results of Midjourney tasks as soon as they are finished.
+        
+        :param task_ids: The IDs of the tasks
+        :param timeout: Maximum time to wait for all tasks, in seconds (raises asyncio.TimeoutError)
+        
+        :return: An async iterator of MidjourneyResult objects in completion order
+        """
+        
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        poller = self.__get_poller()
+        task_ids = list(dict.fromkeys(task_ids))
+        pending = {asyncio.shield(poller.watch(task_id)) for task_id in task_ids}
+        try:
+            while pending:
+                remaining = None if deadline is None else max(0, deadline - loop.time())
+                done, pending = await asyncio.wait(pending,
+                                                   timeout=remaining,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise asyncio.TimeoutError
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+            for task_id in task_ids:
+                poller.unwatch(task_id)
+    
+    async def resume_midjourney_tasks(self,
+                                      timeout: Optional[float] = None) -> AsyncIterator["MidjourneyResult"]:
+        """
+        Resume polling the Midjourney tasks left pending in the journal (e.g. by a previous run).
+        
+        Results are recorded in the journal as the tasks finish.
+        
+        :param timeout: Maximum time to wait for all tasks, in seconds (raises asyncio.TimeoutError)
+        
+        :return: An async iterator of MidjourneyResult objects in completion order
+        """
+        
+        task_ids = await self.claim_pending_tasks()
+        async for result in self.as_completed(task_ids, timeout=timeout):
+            yield result
     
     async def image_upscaling(self,
-                              image: str | bytes,
+                              image: Media,
                               model: str,
                               resize: Optional[int] = 2) -> bytes:     
         """
@@ -336,16 +734,14 @@ class VisionCraftClient(HTTPClient):
         API Docs: https://docs.visioncraft.top/interacting-with-the-api/image-upscale/upscale
         SDK Docs: https://vision.b2k.tech/docs/api-methods/image-upscale/image_upscaling
         
-        :param image: A URL or bytes object of the image to upscale
+        :param image: A URL (str), bytes, memoryview, pathlib.Path or binary file object of the image to upscale
         :param model: An upscale model from the list of available models
         :param resize: How many times to improve a photo (2 or 4)
         
         :return: A bytes object of the upscaled image
         """   
         
-        if type(image) == bytes:
-            image = base64.b64encode(image).decode('utf-8')
-        
+        image = await self.__preprocess(image, f'{self.API_HOST}/upscale')
         json = {
             "image": image,
             "token": self.api_key,
@@ -353,10 +749,21 @@ class VisionCraftClient(HTTPClient):
             "resize": resize
         }
         
-        return await self.__post(f'{self.API_HOST}/upscale', json=json)
+        body = self.__media_body(json, "image")
+        key = await self.__disk_key('upscale', body)
+        if key is not None and (cached := await asyncio.to_thread(self.disk_cache.get, key)) is not None:
+            return cached
+        
+        result = await self.__post(f'{self.API_HOST}/upscale',
+                                   family=ModelFamily.IMAGEUPSCALING,
+                                   coalesce=True,
+                                   **body)
+        if key is not None and isinstance(result, bytes):
+            await asyncio.to_thread(self.disk_cache.set, key, result)
+        return result
     
     async def image2image(self,
-                          image: str | bytes,
+                          image: Media,
                           prompt: str,
                           scheduler: str,
                           refiner: str,
@@ -370,11 +777,11 @@ class VisionCraftClient(HTTPClient):
         API Docs: https://docs.visioncraft.top/interacting-with-the-api/image2image/generation
         SDK Docs: https://vision.b2k.tech/docs/api-methods/image2image/image2image
         
-        :param image: A URL or bytes object of the image to generate
+        :param image: A URL (str), bytes, memoryview, pathlib.Path or binary file object of the image to generate
         :param prompt: A text prompt for image generation
         :param scheduler: A scheduler from the list of available schedulers
         :param refiner: A refiner from the list of available refiners
-        :param mask: A mask for the image
+        :param mask: A mask for the image (the image isn't preprocessed when a mask is given, so both keep the same size)
         :param negative_prompt: A negative text prompt for image generation
         :param steps: Number of steps for image generation (min: 1, max: 50, default: 50)
         :param strength: Strength of the image generation (min: 0.1, max: 1.0, default: 0.8)
@@ -382,9 +789,8 @@ class VisionCraftClient(HTTPClient):
         :return: A bytes object of the generated image
         """
         
-        if type(image) == bytes:
-            image = base64.b64encode(image).decode('utf-8')
-        
+        if not mask:
+            image = await self.__preprocess(image, f'{self.API_HOST}/img2img')
         json = {
             "image": image,
             "prompt": prompt,
@@ -397,7 +803,9 @@ class VisionCraftClient(HTTPClient):
             "token": self.api_key
         }
         
-        return await self.__post(f'{self.API_HOST}/img2img', json=json)
+        return await self.__post(f'{self.API_HOST}/img2img',
+                                 family=ModelFamily.IMG2IMG,
+                                 **self.__media_body(json, "image"))
     
     async def generate_gif(self,
                            prompt: str,
@@ -428,7 +836,9 @@ class VisionCraftClient(HTTPClient):
             "token": self.api_key
         }
         
-        result = await self.__post(f'{self.API_HOST}/generate-gif', json=json)
+        result = await self.__post(f'{self.API_HOST}/generate-gif',
+                                   family=ModelFamily.TEXT2GIF,
+                                   json=json)
         return result['images'][0]
     
     async def llm_chatting(self,
@@ -440,7 +850,7 @@ class VisionCraftClient(HTTPClient):
                            top_k: Optional[int] = 0,
                            repetition_penalty: Optional[int] = 1,
                            presence_penalty: Optional[int] = 0,
-                           frequency_penalty: Optional[int] = 0,) -> LLMAnswer:
+                           frequency_penalty: Optional[int] = 0,) -> "LLMAnswer":
         """
         Chat with LLM models.
         
@@ -459,48 +869,128 @@ class VisionCraftClient(HTTPClient):
         
         :return: A LLMAnswer object
         """
-                    
+        
+        headers, data = self.__llm_payload(model=model,
+                                           messages=messages,
+                                           max_tokens=max_tokens,
+                                           temperature=temperature,
+                                           top_p=top_p,
+                                           top_k=top_k,
+                                           repetition_penalty=repetition_penalty,
+                                           presence_penalty=presence_penalty,
+                                           frequency_penalty=frequency_penalty)
+        
+        result = await self.__post(f'{self.API_HOST}/v1/chat/completions',
+                                   family=ModelFamily.LLM,
+                                   coalesce=temperature == 0,
+                                   headers=headers,
+                                   json=data)
+        return models.LLMAnswer(**result['choices'][0]['message'])
+    
+    def llm_chatting_stream(self,
+                            model: str,
+                            messages: list[dict],
+                            max_tokens: Optional[int] = 4096,
+                            temperature: Optional[float] = 0.7,
+                            top_p: Optional[float] = 0.9,
+                            top_k: Optional[int] = 0,
+                            repetition_penalty: Optional[int] = 1,
+                            presence_penalty: Optional[int] = 0,
+                            frequency_penalty: Optional[int] = 0) -> LLMStream:
+        """
+        Chat with LLM models, receiving the answer token by token.
+        
+        Usage: ``async for delta in client.llm_chatting_stream(...)``.
+        Call ``await stream.get_answer()`` to get the full LLMAnswer.
+        
+        :param model: An LLM model from the list of available models
+        :param messages: A list of messages for chatting
+        :param max_tokens: Maximum length of the newly generated generated text (min: 128, max: 100000, default: 512)
+        :param temperature: Temperature for sampling (min: 0, max: 100, default: 0.7)
+        :param top_p: Top-p for nucleus sampling (min: 0, max: 1, default: 0.9)
+        :param top_k: Top-k for nucleus sampling (min: 0, max: 99999, default: 0)
+        :param repetition_penalty: Repetition penalty for sampling (min: 0.01, max: 5, default: 1)
+        :param presence_penalty: Presence penalty for sampling (min: -2, max: 2, default: 0)
+        :param frequency_penalty: Frequency penalty for sampling (min: -2, max: 2, default: 0)
+        
+        :return: A LLMStream object (async iterator of text deltas)
+        """
+        
+        return LLMStream(self._llm_events(model=model,
+                                          messages=messages,
+                                          max_tokens=max_tokens,
+                                          temperature=temperature,
+                                          top_p=top_p,
+                                          top_k=top_k,
+                                          repetition_penalty=repetition_penalty,
+                                          presence_penalty=presence_penalty,
+                                          frequency_penalty=frequency_penalty))
+    
+    def _llm_events(self,
+                    model: str,
+                    messages: list[dict],
+                    **params) -> AsyncIterator[dict]:
+        """Stream the chat completion chunks of an LLM answer (see ``llm_chatting_stream``)."""
+        headers, data = self.__llm_payload(model=model,
+                                           messages=messages,
+                                           **params)
+        data["stream"] = True
+        return self.__stream_post(f'{self.API_HOST}/v1/chat/completions',
+                                  family=ModelFamily.LLM,
+                                  headers=headers,
+                                  json=data)
+    
+    def __llm_payload(self,
+                      model: str,
+                      messages: list[dict],
+                      **params) -> tuple[dict, dict]:
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}"
-        }  
-    
+        }
+        
         data = {
             "model": model,
             "messages": messages,
-            "max_tokens": max_tokens,
-            "temperature": temperature,
-            "top_p": top_p,
-            "top_k": top_k,
-            "repetition_penalty": repetition_penalty,
-            "presence_penalty": presence_penalty,
-            "frequency_penalty": frequency_penalty,
+            **params,
             "token": self.api_key
         }
-        
-        result = await self.__post(f'{self.API_HOST}/v1/chat/completions',
-                                   headers=headers,
-                                   json=data)
-        return LLMAnswer(**result['choices'][0]['message'])
+        return headers, data
     
     async def whisper(self,
-                      audio: str | bytes,
+                      audio: Media,
                       task: str,
-                      language: Optional[str] = 'auto') -> WhisperResult:
+                      language: Optional[str] = 'auto',
+                      window: Optional[float] = None,
+                      overlap: Optional[float] = 5,
+                      concurrency: Optional[int] = 4) -> "WhisperResult":
         """
         Transcribe or translate an audio to text using Whisper model.
         
+        With ``window`` set (long audio mode), a WAV audio is split into overlapping
+        windows that are transcribed concurrently and merged into one result.
+        A failed window is retried on its own according to the client's retry policy
+        (or the default RetryPolicy).
+        
         API Docs: https://docs.visioncraft.top/interacting-with-the-api/whisper/audio-transcription-or-translation
         SDK Docs: https://vision.b2k.tech/docs/api-methods/whisper/whisper
         
-        :param audio: A URL or bytes object of the audio to transcribe or translate
+        :param audio: A URL (str), bytes, memoryview, pathlib.Path or binary file object of the audio to transcribe or translate
         :param task: A task to perform (transcribe or translate)
         :param language: An audio language in ISO 639-1 format (default: auto)
+        :param window: Length of a window in long audio mode, in seconds (default: None, the audio is sent at once)
+        :param overlap: Length of the overlap between two windows, in seconds (default: 5)
+        :param concurrency: Maximum number of windows transcribed at once (default: 4)
         
         :return: A WhisperResult object
         """
-        if type(audio) == bytes:
-            audio = base64.b64encode(audio).decode("utf-8")
+        if window is not None:
+            return await self.__whisper_windows(audio=audio,
+                                                task=task,
+                                                language=language,
+                                                window=window,
+                                                overlap=overlap,
+                                                concurrency=concurrency)
         
         json = {
             "audio": audio,
@@ -509,5 +999,162 @@ class VisionCraftClient(HTTPClient):
             "token": self.api_key
         }
         
-        result = await self.__post(f'{self.API_HOST}/whisper', json=json)
-        return WhisperResult(**result)
\ No newline at end of file
+        return await self.__transcribe(json)
+    
+    async def __transcribe(self,
+                           json: dict,
+                           **options) -> "WhisperResult":
+        body = self.__media_body(json, "audio")
+        key = await self.__disk_key('whisper', body)
+        if key is not None and (cached := await asyncio.to_thread(self.disk_cache.get, key)) is not None:
+            return models.WhisperResult.from_api(self.json_codec.decode(cached))
+        
+        result = await self.__post(f'{self.API_HOST}/whisper',
+                                   family=ModelFamily.WHISPER,
+                                   coalesce=True,
+                                   **body,
+                                   **options)
+        result = models.WhisperResult.from_api(result)
+        if key is not None:
+            await asyncio.to_thread(self.disk_cache.set, key, result.model_dump_json().encode('utf-8'))
+        return result
+    
+    async def __whisper_windows(self,
+                                audio: Media,
+                                task: str,
+                                language: str,
+                                window: float,
+                                overlap: float,
+                                concurrency: int) -> "WhisperResult":
+        async def transcribe(window: AudioWindow) -> tuple[AudioWindow, "WhisperResult"]:
+            json = {
+                "audio": window.audio,
+                "task": task,
+                "language": language,
+                "token": self.api_key
+            }
+            result = await self.__transcribe(json,
+                                             idempotent=True,
+                                             retry_policy=policy)
+            return window, result
+        
+        # A window is a fixed slice of the audio, so repeating its request is safe
+        policy = self.retry_policy or RetryPolicy()
+        
+        requests = ({"window": item} for item in split_wav(audio, window, overlap))
+        results = []
+        async with aclosing(run_batch(transcribe,
+                                      requests,
+                                      concurrency=concurrency,
+                                      ordered=True)) as batch:
+            async for item in batch:
+                if not item.ok:
+                    raise item.exception
+                results.append(item.result)
+        return merge_whisper_results(results, overlap)
+    
+    async def download_results(self,
+                               urls: Iterable[str],
+                               dest: Optional[str | os.PathLike] = None,
+                               concurrency: Optional[int] = 4) -> list[Path] | list[bytes]:
+        """
+        Download generated images or GIFs using the client's connection pool.
+        
+        Failed downloads are retried according to the client's retry policy
+        (or the default RetryPolicy).
+        
+        :param urls: URLs returned by ``generate_image``, ``generate_xl_image``, ``generate_gif`` or ``MidjourneyResult.URL``
+        :param dest: A directory to save the files to (None to return bytes)
+        :param concurrency: Maximum number of simultaneous downloads (default: 4)
+        
+        :return: A list of file paths or bytes objects in the order of the URLs
+        """
+        
+        async with self._session_scope() as session:
+            downloader = ResultDownloader(session, self.retry_policy or RetryPolicy())
+            return await downloader.download_all(list(urls),
+                                                 dest=dest,
+                                                 concurrency=concurrency)
+    
+    async def iter_result(self,
+                          url: str,
+                          chunk_size: Optional[int] = 64 * 1024) -> AsyncIterator[bytes]:
+        """
+        Stream a generated image or GIF in chunks using the client's connection pool.
+        
+        :param url: A URL of the result
+        :param chunk_size: Size of the chunks, in bytes (default: 65536)
+        
+        :return: An async iterator of bytes objects
+        """
+        
+        async with self._session_scope() as session:
+            downloader = ResultDownloader(session, self.retry_policy or RetryPolicy(), chunk_size)
+            async for chunk in downloader.iter_chunks(url):
+                yield chunk
+    
+    async def generate_batch(self,
+                             requests: Iterable[dict],
+                             method: Optional[str] = 'generate_image',
+                             concurrency: Optional[int] = 4,
+                             ordered: Optional[bool] = False) -> AsyncIterator[BatchResult]:
+        """
+        Run many generation jobs with bounded concurrency.
+        
+        A failed job (HTTPError, InvalidParam, RateLimitExceeded, ...) is reported
+        in its BatchResult and doesn't cancel the other jobs.
+        
+        :param requests: Keyword arguments of the jobs (e.g. ``{"prompt": ..., "model": ..., "sampler": ...}``)
+        :param method: A client method to call (generate_image, generate_xl_image, image2image, image_upscaling or generate_gif)
+        :param concurrency: Maximum number of jobs in flight (default: 4)
+        :param ordered: Yield results in input order instead of completion order (default: False)
+        
+        :return: An async iterator of BatchResult objects
+        """
+        
+        if method not in self.BATCH_METHODS:
+            raise ValueError(f'{method} is not supported in batches')
+        
+        async for result in run_batch(getattr(self, method),
+                                      requests,
+                                      concurrency=concurrency,
+                                      ordered=ordered):
+            yield result
+    
+    async def generation_pipeline(self,
+                                  requests: Iterable[dict] | AsyncIterable[dict],
+                                  upscale_model: str,
+                                  method: Optional[str] = 'generate_image',
+                                  resize: Optional[int] = 2,
+                                  image2image: Optional[dict] = None,
+                                  concurrency: Optional[dict[str, int]] = None,
+                                  buffer: Optional[int] = 16) -> AsyncIterator[PipelineItem]:
+        """
+        Generate, download, upscale and optionally transform images in a streaming pipeline.
+        
+        Every stage has its own concurrency and passes each image to the next stage as
+        soon as it is done, so an image is finished after the sum of its own stage times
+        instead of waiting for the slowest job of every stage. A failed item is yielded
+        at once with the name of its stage (``item.stage``) and its exception.
+        
+        :param requests: Keyword arguments of the generation jobs (e.g. ``{"prompt": ..., "model": ..., "sampler": ...}``)
+        :param upscale_model: An upscale model from the list of available models
+        :param method: The generation method (generate_image or generate_xl_image)
+        :param resize: How many times to improve the images (2 or 4)
+        :param image2image: Keyword arguments of ``image2image`` (the prompt defaults to the generation prompt), None to skip the stage
+        :param concurrency: Number of items processed at the same time by stage ("generate", "download", "upscale", "image2image")
+        :param buffer: Capacity of the queues between stages (default: 16)
+        
+        :return: An async iterator of PipelineItem objects in completion order, ``item.value`` is the bytes of the image
+        """
+        
+        pipeline = image_pipeline(self,
+                                  upscale_model,
+                                  method=method,
+                                  resize=resize,
+                                  image2image=image2image,
+                                  concurrency=concurrency,
+                                  buffer=buffer)
+        async with aclosing(pipeline.run(requests)) as items:
+            async for item in items:
+                yield item
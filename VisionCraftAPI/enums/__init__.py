@@ -1,7 +1,11 @@
 from .modes import WhisperMode
 from .task_statuses import TaskStatus
+from .model_families import ModelFamily
+from .priorities import Priority
 
 __all__ = [
     "WhisperMode",
-    "TaskStatus"
+    "TaskStatus",
+    "ModelFamily",
+    "Priority"
 ]
\ No newline at end of file
@@ -0,0 +1,12 @@
+from enum import StrEnum
+
+class ModelFamily(StrEnum):
+    """An enum of the model families the API limits separately."""
+    LLM = "LLM"
+    STABLEDIFFUSION = "STABLEDIFFUSION"
+    STABLEDIFFUSIONXL = "STABLEDIFFUSIONXL"
+    IMG2IMG = "IMG2IMG"
+    TEXT2GIF = "TEXT2GIF"
+    WHISPER = "WHISPER"
+    IMAGEUPSCALING = "IMAGEUPSCALING"
+    MIDJOURNEY = "MIDJOURNEY"
\ No newline at end of file
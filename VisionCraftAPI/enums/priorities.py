@@ -0,0 +1,7 @@
+from enum import IntEnum
+
+class Priority(IntEnum):
+    """An enum of the priority classes of requests (lower is served first)."""
+    INTERACTIVE = 0
+    DEFAULT = 1
+    BULK = 2
\ No newline at end of file
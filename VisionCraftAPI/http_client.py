@@ -1,53 +1,304 @@
 import ssl
-import certifi
 
-from typing import Optional
-from aiohttp import ClientSession, TCPConnector
+from functools import lru_cache
+from contextlib import asynccontextmanager, nullcontext
+from typing import AsyncIterator, Optional
+from aiohttp import ClientResponse, ClientSession, TCPConnector
 
-from .utils import checker
+from .enums import Priority
+from .utils import (checker,
+                    AdaptiveLimiter,
+                    Lease,
+                    JSONCodec,
+                    RetryPolicy,
+                    RequestScheduler,
+                    RequestTrace,
+                    Tracer,
+                    Offloader,
+                    default_codec,
+                    request_context)
+
+@lru_cache(maxsize=None)
+def get_ssl_context() -> ssl.SSLContext:
+    """Build the SSL context once (on the first session) and share it between all sessions."""
+    import certifi
+    return ssl.create_default_context(cafile=certifi.where())
 
 class HTTPClient:
-    """Represents an HTTP client sending HTTP requests to the API."""
+    """
+    Represents an HTTP client sending HTTP requests to the API.
+
+    The client keeps a long-lived connection pool after ``start()`` is called
+    (or while it is used as ``async with client:``). Without it, a one-off
+    session is created for every request.
 
-    def __init__(self) -> None:
-        ...
+    :param connection_limit: Total number of simultaneous connections in the pool (0 for no limit)
+    :param connection_limit_per_host: Number of simultaneous connections to one host (0 for no limit)
+    :param keepalive_timeout: How long to keep idle connections alive, in seconds
+    :param dns_cache_ttl: How long to cache resolved DNS records, in seconds
+    :param retry_policy: A RetryPolicy for failed requests (None to disable retries)
+    :param scheduler: A RequestScheduler limiting requests in flight per endpoint (None for no limits)
+    :param tracer: A Tracer recording a timeline of every request (None to disable tracing)
+    :param json_codec: A JSONCodec for request and response bodies (orjson or msgspec if installed, otherwise stdlib ``json``)
+    :param offload: An Offloader parsing large JSON responses in an executor (None to parse them on the loop)
+    :param concurrency_limiter: An AdaptiveLimiter adjusting the number of requests in flight per endpoint to the API's capacity
+    """
 
-    async def __aenter__(self, *args, **kwargs) -> None:
-        """Create a new session."""
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
-        connector = TCPConnector(ssl=ssl_context)
-        self._session = ClientSession(connector=connector)
+    def __init__(self,
+                 connection_limit: int = 100,
+                 connection_limit_per_host: int = 0,
+                 keepalive_timeout: float = 30,
+                 dns_cache_ttl: int = 300,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 scheduler: Optional[RequestScheduler] = None,
+                 tracer: Optional[Tracer] = None,
+                 json_codec: Optional[JSONCodec] = None,
+                 offload: Optional[Offloader] = None,
+                 concurrency_limiter: Optional[AdaptiveLimiter] = None) -> None:
+        self._session: Optional[ClientSession] = None
+        self.retry_policy = retry_policy
+        self.scheduler = scheduler
+        self.tracer = tracer
+        self.json_codec = json_codec or default_codec()
+        self.offload = offload
+        self.concurrency_limiter = concurrency_limiter
+        self.__connector_options = {
+            "limit": connection_limit,
+            "limit_per_host": connection_limit_per_host,
+            "keepalive_timeout": keepalive_timeout,
+            "ttl_dns_cache": dns_cache_ttl
+        }
+
+    async def __aenter__(self) -> "HTTPClient":
+        """Start a persistent session."""
+        await self.start()
+        return self
 
     async def __aexit__(self, *args, **kwargs) -> None:
-        """Close the session."""
-        await self._session.close()
+        """Close the persistent session."""
+        await self.close()
+
+    @property
+    def started(self) -> bool:
+        """Whether a persistent session is open."""
+        return self._session is not None and not self._session.closed
+
+    def _create_session(self) -> ClientSession:
+        """Create a new session with a pooled connector."""
+        connector = TCPConnector(ssl=get_ssl_context(),
+                                 **self.__connector_options)
+        if self.tracer is None:
+            return ClientSession(connector=connector)
+        return ClientSession(connector=connector,
+                             trace_configs=[self.tracer.trace_config()])
+
+    async def start(self) -> None:
+        """Open a persistent session reused by all subsequent requests."""
+        if not self.started:
+            self._session = self._create_session()
+
+    async def close(self) -> None:
+        """Close the persistent session and release pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def request_context(self,
+                        priority: Priority = Priority.DEFAULT,
+                        tenant: str = 'default'):
+        """
+        Set the priority class and the tenant of the requests made inside the block
+        (used by the scheduler).
+
+        Usage: ``with client.request_context(Priority.INTERACTIVE, tenant="user-42"):``
+        """
+        return request_context(priority=priority, tenant=tenant)
+
+    @asynccontextmanager
+    async def _slot(self,
+                    url: str,
+                    streaming: bool = False) -> AsyncIterator[Optional[Lease]]:
+        """
+        Hold a scheduler slot, then a slot of the adaptive window, for the endpoint of a URL.
+
+        :return: The Lease of the adaptive window (None without a concurrency limiter)
+        """
+        scheduler = nullcontext() if self.scheduler is None else self.scheduler.slot(url)
+        limiter = (nullcontext() if self.concurrency_limiter is None
+                   else self.concurrency_limiter.slot(url, streaming=streaming))
+        async with scheduler, limiter as lease:
+            yield lease
+
+    @asynccontextmanager
+    async def _session_scope(self) -> AsyncIterator[ClientSession]:
+        """Use the persistent session if it is open, otherwise a one-off session."""
+        if self.started:
+            yield self._session
+            return
+        async with self._create_session() as session:
+            yield session
+
+    def __encode_json(self,
+                      kwargs: dict) -> dict:
+        """Replace a ``json`` argument with a body encoded by the JSON codec."""
+        if 'json' not in kwargs:
+            return kwargs
+        kwargs = dict(kwargs)
+        body = kwargs.pop('json')
+        if body is not None:
+            kwargs['data'] = self.json_codec.encode(body)
+            kwargs['headers'] = {"Content-Type": "application/json",
+                                 **(kwargs.get('headers') or {})}
+        return kwargs
 
-    async def _request(self, 
+    async def _request(self,
                        method: str,
-                       url: str, 
+                       url: str,
+                       idempotent: Optional[bool] = None,
+                       retry_policy: Optional[RetryPolicy] = None,
                        **kwargs) -> Optional[dict]:
-        """Make a request to the API."""
-        async with self:
-            async with self._session.request(method, url, **kwargs) as response:
-                if response.content_type == 'application/json':
-                    data = await response.json()
-                elif response.content_type == 'text/plain':
-                    data = await response.text()
-                else:
-                    data = await response.read()
-            return self.__check_exception(data=data, 
-                                          status_code=response.status)
-            
-    def __check_exception(self, 
+        """
+        Make a request to the API, retrying it according to the retry policy.
+
+        :param idempotent: Whether the request is safe to repeat (by default only GET requests are)
+        :param retry_policy: A RetryPolicy used instead of the client's one
+        """
+        kwargs = self.__encode_json(kwargs)
+        policy = retry_policy or self.retry_policy
+        if policy is None or not policy.allows(method, url, idempotent):
+            return await self.__attempt(method, url, **kwargs)
+        if self.tracer is None:
+            return await policy.call(self.__attempt, method, url, **kwargs)
+
+        def on_retry(attempt: int, exception: Exception, delay: float) -> None:
+            self.tracer.event('retry', url,
+                              attempt=attempt,
+                              exception=exception,
+                              delay=delay)
+        return await policy.call(self.__attempt, method, url,
+                                 on_retry=on_retry,
+                                 **kwargs)
+
+    async def __attempt(self,
+                        method: str,
+                        url: str,
+                        **kwargs) -> Optional[dict]:
+        """Make a single request to the API."""
+        if self.tracer is None:
+            async with self._slot(url), self._session_scope() as session:
+                return await self.__send(session, method, url, **kwargs)
+
+        trace = RequestTrace(method, url)
+        try:
+            async with self._slot(url), self._session_scope() as session:
+                result = await self.__send(session, method, url,
+                                           trace_request_ctx=trace,
+                                           **kwargs)
+        except BaseException as e:
+            self.tracer.finish(trace, e)
+            raise
+        self.tracer.finish(trace)
+        return result
+
+    async def __send(self,
+                     session: ClientSession,
+                     method: str,
+                     url: str,
+                     **kwargs) -> Optional[dict]:
+        """Send a request using the given session."""
+        async with session.request(method, url, **kwargs) as response:
+            data = await self.__read(response)
+        return self.__check_exception(data=data,
+                                      status_code=response.status)
+
+    async def __read(self,
+                     response: ClientResponse) -> dict | str | bytes:
+        """Read the response body according to its content type."""
+        if response.content_type == 'application/json':
+            body = await response.read()
+            if not body or body.isspace():
+                return None
+            if self.offload is not None:
+                return await self.offload.run(len(body), self.json_codec.decode, body)
+            return self.json_codec.decode(body)
+        elif response.content_type == 'text/plain':
+            return await response.text()
+        return await response.read()
+
+    async def _stream(self,
+                      method: str,
+                      url: str,
+                      **kwargs) -> AsyncIterator[dict]:
+        """
+        Make a streaming request to the API.
+
+        Yields the JSON data of every server-sent event. If the API answers
+        with a regular JSON body instead, it is yielded once.
+        """
+        kwargs = self.__encode_json(kwargs)
+        if self.tracer is None:
+            async with self._slot(url, streaming=True) as lease, self._session_scope() as session:
+                async for event in self.__stream(session, method, url, **kwargs):
+                    if lease is not None:
+                        lease.mark_first_byte()
+                    yield event
+            return
+
+        trace = RequestTrace(method, url)
+        try:
+            async with self._slot(url, streaming=True) as lease, self._session_scope() as session:
+                async for event in self.__stream(session, method, url,
+                                                 trace_request_ctx=trace,
+                                                 **kwargs):
+                    if lease is not None:
+                        lease.mark_first_byte()
+                    yield event
+        except BaseException as e:
+            self.tracer.finish(trace, e)
+            raise
+        self.tracer.finish(trace)
+
+    async def __stream(self,
+                       session: ClientSession,
+                       method: str,
+                       url: str,
+                       **kwargs) -> AsyncIterator[dict]:
+        """Send a streaming request using the given session."""
+        async with session.request(method, url, **kwargs) as response:
+            if response.status != 200 or response.content_type != 'text/event-stream':
+                yield self.__check_exception(data=await self.__read(response),
+                                             status_code=response.status)
+                return
+            async for line in response.content:
+                line = line.strip()
+                if not line.startswith(b'data:'):
+                    continue
+                data = line[5:].strip()
+                if data == b'[DONE]':
+                    return
+                event = self.json_codec.decode(data)
+                yield self.__check_exception(data=event,
+                                             status_code=response.status)
+
+    def __check_exception(self,
                           data: str,
                           status_code: int):
         """Check if the response contains an exception."""
         if isinstance(data, dict):
             if data.get('error') or data.get('detail'):
-                exception = data.get('error').get('message') or data.get('detail')
+                exception = (data.get('error') or {}).get('message') or data.get('detail')
                 checker.check(exception=exception,
                               status_code=data.get('code') or status_code)
         if status_code != 200:
-            checker.check(exception=data,
+            checker.check(exception=self.__error_message(data),
                           status_code=status_code)
-        return data
\ No newline at end of file
+        return data
+
+    @staticmethod
+    def __error_message(data) -> str:
+        """Get the text of an error body (e.g. an HTML page from a proxy, or an empty body)."""
+        if data is None:
+            return ''
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            return bytes(data).decode('utf-8', errors='replace')
+        return data if isinstance(data, str) else str(data)
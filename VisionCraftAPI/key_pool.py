@@ -0,0 +1,371 @@
+import asyncio
+import inspect
+
+from contextlib import aclosing
+from functools import wraps
+from typing import TYPE_CHECKING, AsyncIterable, AsyncIterator, Iterable, Optional
+
+from .api import VisionCraftClient
+from .enums import ModelFamily
+from .exceptions import InvalidAPIKey, RateLimitExceeded
+from .utils import BatchResult, LLMStream, PipelineItem, run_batch, image_pipeline, request_context
+from .utils.task_journal import key_id
+
+if TYPE_CHECKING:
+    from .models import MidjourneyResult
+
+class VisionCraftKeyPool:
+    """
+    Client spreading calls across several VisionCraft API keys.
+
+    Every call goes to the key with the most remaining quota for its model family
+    (when rate limiters are configured) and the fewest calls in flight.
+    A key that raises RateLimitExceeded is cooled down for ``retry_after`` seconds
+    and a key that raises InvalidAPIKey is removed from the pool; in both cases
+    the call is sent again with another key.
+
+    All coroutine methods of VisionCraftClient, ``llm_chatting_stream``, ``iter_result``
+    and ``request_context`` are available with the same signatures.
+    The keys share one connection pool while the pool is used as ``async with pool:``,
+    and one catalog cache and set of coalesced calls (``catalog_ttl``, ``coalesce``).
+
+    :param api_keys: Your VisionCraft API keys
+    :param client_options: Keyword arguments for every VisionCraftClient (except ``rate_limiter``, see ``configure_rate_limiters``)
+    """
+
+    METHOD_FAMILIES = {
+        'llm_chatting': ModelFamily.LLM,
+        'generate_image': ModelFamily.STABLEDIFFUSION,
+        'generate_xl_image': ModelFamily.STABLEDIFFUSIONXL,
+        'image2image': ModelFamily.IMG2IMG,
+        'generate_gif': ModelFamily.TEXT2GIF,
+        'whisper': ModelFamily.WHISPER,
+        'image_upscaling': ModelFamily.IMAGEUPSCALING,
+        'create_midjourney_task': ModelFamily.MIDJOURNEY
+    }
+    TASK_METHODS = frozenset({'get_midjourney_task', 'wait_midjourney_task'})
+
+    def __init__(self,
+                 api_keys: Iterable[str],
+                 **client_options) -> None:
+        self.__clients = {key: VisionCraftClient(key, **client_options)
+                          for key in dict.fromkeys(api_keys)}
+        if not self.__clients:
+            raise ValueError('At least one API key is required')
+        first, *others = self.__clients.values()
+        for client in others:
+            client._share_caches(first)
+        self.__in_flight = {key: 0 for key in self.__clients}
+        self.__cooldowns = {key: 0.0 for key in self.__clients}
+        self.__task_keys: dict[int, str] = {}
+        self.__session = None
+        self.__journal = client_options.get('journal')
+
+    @property
+    def api_keys(self) -> list[str]:
+        """API keys still in the pool."""
+        return list(self.__clients)
+
+    @property
+    def in_flight(self) -> dict[str, int]:
+        """Number of calls in flight per API key."""
+        return dict(self.__in_flight)
+
+    def client(self,
+               api_key: str) -> VisionCraftClient:
+        """Get the client of an API key."""
+        return self.__clients[api_key]
+
+    async def __aenter__(self) -> "VisionCraftKeyPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args, **kwargs) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        """Open one persistent session shared by all keys."""
+        if self.__session is None or self.__session.closed:
+            self.__session = next(iter(self.__clients.values()))._create_session()
+        for client in self.__clients.values():
+            client._session = self.__session
+
+    async def close(self) -> None:
+        """Close the shared session."""
+        for client in self.__clients.values():
+            client._session = None
+        if self.__session is not None:
+            await self.__session.close()
+            self.__session = None
+
+    async def configure_rate_limiters(self,
+                                      tiers: str | dict[str, str] = 'FREE') -> None:
+        """
+        Configure a client-side rate limiter for every key.
+
+        :param tiers: A tier name for all keys, or a dictionary of tier names by API key
+        """
+        for key, client in self.__clients.items():
+            tier = tiers if isinstance(tiers, str) else tiers.get(key, 'FREE')
+            await client.configure_rate_limiter(tier)
+
+    def __score(self,
+                key: str,
+                family: Optional[ModelFamily]) -> tuple[float, int]:
+        limiter = self.__clients[key].rate_limiter
+        available = float('inf') if limiter is None or family is None else limiter.available(family)
+        return available, -self.__in_flight[key]
+
+    async def __select(self,
+                       family: Optional[ModelFamily],
+                       exclude: set[str]) -> Optional[str]:
+        loop = asyncio.get_running_loop()
+        candidates = [key for key in self.__clients if key not in exclude]
+        if not candidates:
+            return None
+        now = loop.time()
+        ready = [key for key in candidates if self.__cooldowns[key] <= now]
+        if not ready:
+            key = min(candidates, key=lambda key: self.__cooldowns[key])
+            await asyncio.sleep(self.__cooldowns[key] - now)
+            return key
+        return max(ready, key=lambda key: self.__score(key, family))
+
+    async def _call(self,
+                    method: str,
+                    *args,
+                    **kwargs):
+        """Call a client method with the best available key."""
+        task_id = kwargs.get('task_id', args[0] if args else None)
+        if method in self.TASK_METHODS:
+            key = await self.__task_key(task_id)
+            if key in self.__clients:
+                return await getattr(self.__clients[key], method)(*args, **kwargs)
+        if method == 'create_midjourney_task' and self.__journal is not None:
+            # A task submitted before a restart is resumed by the client of its key
+            prompt = kwargs.get('prompt', args[0] if args else None)
+            for key, client in list(self.__clients.items()):
+                task = await client.claim_pending(prompt)
+                if task is not None:
+                    self.__task_keys[task.data] = key
+                    return task
+
+        family = self.METHOD_FAMILIES.get(method)
+        tried: set[str] = set()
+        error: Optional[Exception] = None
+        while True:
+            key = await self.__select(family, tried)
+            if key is None:
+                raise error or InvalidAPIKey(message='No API keys left in the pool')
+            tried.add(key)
+            client = self.__clients.get(key)
+            if client is None:
+                continue
+            self.__in_flight[key] += 1
+            try:
+                result = await getattr(client, method)(*args, **kwargs)
+            except RateLimitExceeded as e:
+                self.__cooldowns[key] = asyncio.get_running_loop().time() + e.retry_after
+                error = e
+                continue
+            except InvalidAPIKey as e:
+                self.__remove(key)
+                error = e
+                continue
+            finally:
+                if key in self.__in_flight:
+                    self.__in_flight[key] -= 1
+            if method == 'create_midjourney_task':
+                self.__task_keys[result.data] = key
+            return result
+
+    async def __task_key(self,
+                         task_id: int) -> Optional[str]:
+        key = self.__task_keys.get(task_id)
+        if key is None and self.__journal is not None:
+            entry = await asyncio.to_thread(self.__journal.get, task_id)
+            if entry is not None:
+                key = {key_id(key): key for key in self.__clients}.get(entry.key_id)
+                if key is not None:
+                    self.__task_keys[task_id] = key
+        return key
+
+    def __remove(self,
+                 key: str) -> None:
+        self.__clients.pop(key, None)
+        self.__in_flight.pop(key, None)
+        self.__cooldowns.pop(key, None)
+
+    async def _stream(self,
+                      family: Optional[ModelFamily],
+                      method: str,
+                      *args,
+                      **kwargs) -> AsyncIterator:
+        """
+        Iterate over a client async iterator with the best available key.
+
+        Another key is tried if the call fails before the first item.
+        """
+        tried: set[str] = set()
+        error: Optional[Exception] = None
+        while True:
+            key = await self.__select(family, tried)
+            if key is None:
+                raise error or InvalidAPIKey(message='No API keys left in the pool')
+            tried.add(key)
+            client = self.__clients.get(key)
+            if client is None:
+                continue
+            self.__in_flight[key] += 1
+            started = False
+            try:
+                async with aclosing(getattr(client, method)(*args, **kwargs)) as items:
+                    async for item in items:
+                        started = True
+                        yield item
+                return
+            except RateLimitExceeded as e:
+                if started:
+                    raise
+                self.__cooldowns[key] = asyncio.get_running_loop().time() + e.retry_after
+                error = e
+            except InvalidAPIKey as e:
+                if started:
+                    raise
+                self.__remove(key)
+                error = e
+            finally:
+                if key in self.__in_flight:
+                    self.__in_flight[key] -= 1
+
+    @wraps(VisionCraftClient.llm_chatting_stream)
+    def llm_chatting_stream(self,
+                            *args,
+                            **kwargs) -> LLMStream:
+        arguments = inspect.signature(VisionCraftClient.llm_chatting_stream).bind(self, *args, **kwargs)
+        arguments.apply_defaults()
+        del arguments.arguments['self']
+        return LLMStream(self._stream(ModelFamily.LLM, '_llm_events', **arguments.arguments))
+
+    @wraps(VisionCraftClient.iter_result)
+    def iter_result(self,
+                    *args,
+                    **kwargs) -> AsyncIterator[bytes]:
+        return self._stream(None, 'iter_result', *args, **kwargs)
+
+    @wraps(VisionCraftClient.request_context)
+    def request_context(self,
+                        *args,
+                        **kwargs):
+        return request_context(*args, **kwargs)
+
+    async def invalidate_cache(self,
+                               endpoint: Optional[str] = None) -> None:
+        """
+        Drop cached catalog responses of every key, from memory and from the disk cache.
+
+        :param endpoint: An endpoint path like "/models" (None to drop everything)
+        """
+        await asyncio.gather(*(client.invalidate_cache(endpoint)
+                               for client in self.__clients.values()))
+
+    def __getattr__(self, name: str):
+        method = getattr(VisionCraftClient, name, None)
+        if name.startswith('_') or not inspect.iscoroutinefunction(method):
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+        @wraps(method)
+        async def call(*args, **kwargs):
+            return await self._call(name, *args, **kwargs)
+        return call
+
+    async def as_completed(self,
+                           task_ids: Iterable[int],
+                           timeout: Optional[float] = None) -> AsyncIterator["MidjourneyResult"]:
+        """
+        Iterate over the results of Midjourney tasks as soon as they are finished.
+
+        :param task_ids: The IDs of the tasks
+        :param timeout: Maximum time to wait for all tasks, in seconds (raises asyncio.TimeoutError)
+
+        :return: An async iterator of MidjourneyResult objects in completion order
+        """
+        waiters = [asyncio.ensure_future(self._call('wait_midjourney_task', task_id))
+                   for task_id in dict.fromkeys(task_ids)]
+        try:
+            for waiter in asyncio.as_completed(waiters, timeout=timeout):
+                yield await waiter
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+
+    async def resume_midjourney_tasks(self,
+                                      timeout: Optional[float] = None) -> AsyncIterator["MidjourneyResult"]:
+        """
+        Resume polling the Midjourney tasks of all keys left pending in the journal.
+
+        :param timeout: Maximum time to wait for all tasks, in seconds (raises asyncio.TimeoutError)
+
+        :return: An async iterator of MidjourneyResult objects in completion order
+        """
+        if self.__journal is None:
+            raise ValueError('The pool has no journal')
+        task_ids = []
+        for key, client in list(self.__clients.items()):
+            for task_id in await client.claim_pending_tasks():
+                self.__task_keys[task_id] = key
+                task_ids.append(task_id)
+        async for result in self.as_completed(task_ids, timeout=timeout):
+            yield result
+
+    async def generate_batch(self,
+                             requests: Iterable[dict],
+                             method: Optional[str] = 'generate_image',
+                             concurrency: Optional[int] = 4,
+                             ordered: Optional[bool] = False) -> AsyncIterator[BatchResult]:
+        """
+        Run many generation jobs with bounded concurrency, spread across the keys.
+
+        :param requests: Keyword arguments of the jobs
+        :param method: A client method to call (see ``VisionCraftClient.BATCH_METHODS``)
+        :param concurrency: Maximum number of jobs in flight (default: 4)
+        :param ordered: Yield results in input order instead of completion order (default: False)
+
+        :return: An async iterator of BatchResult objects
+        """
+        if method not in VisionCraftClient.BATCH_METHODS:
+            raise ValueError(f'{method} is not supported in batches')
+
+        async def call(**request):
+            return await self._call(method, **request)
+
+        async for result in run_batch(call,
+                                      requests,
+                                      concurrency=concurrency,
+                                      ordered=ordered):
+            yield result
+
+    async def generation_pipeline(self,
+                                  requests: Iterable[dict] | AsyncIterable[dict],
+                                  upscale_model: str,
+                                  method: Optional[str] = 'generate_image',
+                                  resize: Optional[int] = 2,
+                                  image2image: Optional[dict] = None,
+                                  concurrency: Optional[dict[str, int]] = None,
+                                  buffer: Optional[int] = 16) -> AsyncIterator[PipelineItem]:
+        """
+        Generate, download, upscale and optionally transform images in a streaming pipeline,
+        every call going to the best available key (see ``VisionCraftClient.generation_pipeline``).
+
+        :return: An async iterator of PipelineItem objects in completion order
+        """
+        pipeline = image_pipeline(self,
+                                  upscale_model,
+                                  method=method,
+                                  resize=resize,
+                                  image2image=image2image,
+                                  concurrency=concurrency,
+                                  buffer=buffer)
+        async with aclosing(pipeline.run(requests)) as items:
+            async for item in items:
+                yield item
@@ -1,7 +1,24 @@
-from .limits import RateLimits, Tiers
-from .midjourney import MidjourneyTask, MidjourneyResult
-from .llm import LLMAnswer
-from .whisper import WhisperResult, Segment, InferenceStatus
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .limits import RateLimits, Tiers
+    from .midjourney import MidjourneyTask, MidjourneyResult
+    from .llm import LLMAnswer
+    from .whisper import WhisperResult, Segment, SegmentTable, InferenceStatus
+
+# The models are imported on first access, so that pydantic is only loaded when it is needed
+_MODULES = {
+    "RateLimits": "limits",
+    "Tiers": "limits",
+    "MidjourneyTask": "midjourney",
+    "MidjourneyResult": "midjourney",
+    "LLMAnswer": "llm",
+    "WhisperResult": "whisper",
+    "Segment": "whisper",
+    "SegmentTable": "whisper",
+    "InferenceStatus": "whisper"
+}
 
 __all__ = [
     "RateLimits",
@@ -9,5 +26,16 @@ __all__ = [
     "MidjourneyResult",
     "LLMAnswer",
     "WhisperResult",
+    "SegmentTable",
     "Tiers"
-]
\ No newline at end of file
+]
+
+def __getattr__(name: str):
+    if name not in _MODULES:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    value = getattr(import_module(f'.{_MODULES[name]}', __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_MODULES})
\ No newline at end of file
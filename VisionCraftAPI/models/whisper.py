@@ -1,5 +1,8 @@
-from typing import List, Optional
-from pydantic import BaseModel
+from array import array
+from collections.abc import Sequence
+from typing import Any, Iterable, Iterator, List, Optional, overload
+from pydantic import BaseModel, GetCoreSchemaHandler
+from pydantic_core import core_schema
 
 class InferenceStatus(BaseModel):
     """Represents the status of the inference."""
@@ -22,13 +25,165 @@ class Segment(BaseModel):
     compression_ratio: float
     no_speech_prob: float
 
+class SegmentTable(Sequence):
+    """
+    Read-only sequence of Whisper segments stored column by column.
+
+    Numbers are kept in typed arrays and the tokens of all segments in one flat
+    array with offsets, so a long transcript takes a fraction of the memory of
+    a list of Segment objects. A Segment is only created when it is accessed;
+    use the columns (``starts``, ``ends``, ``texts``...) or ``tokens_of()`` to
+    avoid creating them at all.
+
+    :param segments: Segment objects or dictionaries with the fields of a Segment
+    """
+
+    NUMBER_COLUMNS = {
+        "id": 'ids',
+        "seek": 'seeks',
+        "start": 'starts',
+        "end": 'ends',
+        "temperature": 'temperatures',
+        "avg_logprob": 'avg_logprobs',
+        "compression_ratio": 'compression_ratios',
+        "no_speech_prob": 'no_speech_probs'
+    }
+
+    def __init__(self,
+                 segments: Iterable[Segment | dict] = ()) -> None:
+        rows = [segment.__dict__ if isinstance(segment, Segment) else segment
+                for segment in segments]
+        # Columns are filled in bulk, which is much faster than appending segment by segment
+        self.ids = array('q', [row["id"] for row in rows])
+        self.seeks = array('q', [row["seek"] for row in rows])
+        self.starts = array('d', [row["start"] for row in rows])
+        self.ends = array('d', [row["end"] for row in rows])
+        self.temperatures = array('d', [row["temperature"] for row in rows])
+        self.avg_logprobs = array('d', [row["avg_logprob"] for row in rows])
+        self.compression_ratios = array('d', [row["compression_ratio"] for row in rows])
+        self.no_speech_probs = array('d', [row["no_speech_prob"] for row in rows])
+        self.texts: list[str] = [row["text"] for row in rows]
+        self.tokens = array('i')
+        self.token_offsets = array('q', [0])
+        for row in rows:
+            self.tokens.extend(row["tokens"])
+            self.token_offsets.append(len(self.tokens))
+
+    def append(self,
+               segment: Segment | dict) -> None:
+        """Add a segment (a Segment object or a dictionary of its fields)."""
+        if isinstance(segment, Segment):
+            segment = segment.__dict__
+        for field, column in self.NUMBER_COLUMNS.items():
+            getattr(self, column).append(segment[field])
+        self.texts.append(segment["text"])
+        self.tokens.extend(segment["tokens"])
+        self.token_offsets.append(len(self.tokens))
+
+    def tokens_of(self,
+                  index: int) -> array:
+        """Get the tokens of a segment without creating a Segment object."""
+        index = range(len(self))[index]
+        return self.tokens[self.token_offsets[index]:self.token_offsets[index + 1]]
+
+    def row(self,
+            index: int) -> dict[str, Any]:
+        """Get the fields of a segment as a dictionary."""
+        index = range(len(self))[index]
+        row = {field: getattr(self, column)[index]
+               for field, column in self.NUMBER_COLUMNS.items()}
+        row["text"] = self.texts[index]
+        row["tokens"] = self.tokens_of(index).tolist()
+        return row
+
+    def rows(self) -> Iterator[dict[str, Any]]:
+        """Iterate over the fields of the segments as dictionaries."""
+        for index in range(len(self)):
+            yield self.row(index)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @overload
+    def __getitem__(self, index: int) -> Segment: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Segment]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self))[index]]
+        # The fields come from the typed columns, there is nothing to validate
+        return Segment.model_construct(**self.row(index))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, SegmentTable):
+            return (self.texts == other.texts
+                    and self.tokens == other.tokens
+                    and self.token_offsets == other.token_offsets
+                    and all(getattr(self, column) == getattr(other, column)
+                            for column in self.NUMBER_COLUMNS.values()))
+        if isinstance(other, Sequence) and not isinstance(other, (str, bytes)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f'SegmentTable(<{len(self)} segments>)'
+
+    def nbytes(self) -> int:
+        """Approximate memory used by the columns, in bytes."""
+        columns = [getattr(self, column) for column in self.NUMBER_COLUMNS.values()]
+        columns += [self.tokens, self.token_offsets]
+        return (sum(column.itemsize * len(column) for column in columns)
+                + sum(len(text) for text in self.texts))
+
+    @classmethod
+    def __validate(cls,
+                   value: Any) -> "SegmentTable":
+        if isinstance(value, cls):
+            return value
+        return cls(value)
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls,
+                                     source: Any,
+                                     handler: GetCoreSchemaHandler) -> core_schema.CoreSchema:
+        from_list = core_schema.no_info_after_validator_function(
+            cls.__validate,
+            handler.generate_schema(List[Segment])
+        )
+        return core_schema.json_or_python_schema(
+            json_schema=from_list,
+            python_schema=core_schema.union_schema([core_schema.is_instance_schema(cls), from_list]),
+            serialization=core_schema.plain_serializer_function_ser_schema(lambda table: list(table.rows()))
+        )
+
 class WhisperResult(BaseModel):
     """
     Represents the result from the Whisper model.
+
+    The segments are stored in a compact SegmentTable (a read-only sequence of Segment objects).
     """
     request_id: str
     inference_status: InferenceStatus
     text: str
-    segments: List[Segment]
+    segments: SegmentTable
     language: str
     input_length_ms: int
+
+    @classmethod
+    def from_api(cls,
+                 data: dict) -> "WhisperResult":
+        """
+        Build a result from a trusted API response without validating it field by field.
+
+        :param data: The JSON response of the whisper endpoint
+        """
+        return cls.model_construct(
+            request_id=data["request_id"],
+            inference_status=InferenceStatus.model_construct(**data["inference_status"]),
+            text=data["text"],
+            segments=SegmentTable(data["segments"]),
+            language=data["language"],
+            input_length_ms=data["input_length_ms"]
+        )
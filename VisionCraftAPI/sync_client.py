@@ -0,0 +1,218 @@
+import asyncio
+import inspect
+import threading
+
+from concurrent.futures import Future
+from functools import wraps
+from typing import Any, Awaitable, Callable, Optional
+
+from .api import VisionCraftClient
+
+class SyncIterator:
+    """
+    Blocking iterator over an async iterator running on the facade's event loop
+    (e.g. ``as_completed``, ``generate_batch``, ``iter_result`` or ``llm_chatting_stream``).
+
+    Other attributes of the async iterator are forwarded, coroutine methods
+    (like ``LLMStream.get_answer``) are run to completion.
+    """
+
+    def __init__(self,
+                 client: "SyncVisionCraftClient",
+                 iterator: Any) -> None:
+        self.__client = client
+        self.__iterator = iterator
+
+    def __iter__(self) -> "SyncIterator":
+        return self
+
+    def __next__(self) -> Any:
+        try:
+            return self.__client.run(self.__iterator.__anext__())
+        except StopAsyncIteration:
+            raise StopIteration from None
+
+    def __enter__(self) -> "SyncIterator":
+        return self
+
+    def __exit__(self, *args, **kwargs) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the async iterator (stops polling, cancels jobs in flight...)."""
+        aclose = getattr(self.__iterator, 'aclose', None)
+        if aclose is not None:
+            self.__client.run(aclose())
+
+    def __getattr__(self, name: str) -> Any:
+        value = getattr(self.__iterator, name)
+        if not inspect.iscoroutinefunction(value):
+            return value
+
+        @wraps(value)
+        def call(*args, **kwargs):
+            return self.__client.run(value(*args, **kwargs))
+        return call
+
+class SyncVisionCraftClient:
+    """
+    Thread-safe synchronous facade of VisionCraftClient for threaded code (WSGI, Celery...).
+
+    One long-lived event loop runs in a background thread and keeps the connection pool
+    open between calls. Every public method of VisionCraftClient is available with the
+    same signature and blocks until its result is ready; async iterators are returned
+    as blocking iterators. Calls made from several threads run concurrently on the loop.
+
+    A call that takes longer than ``timeout`` is cancelled and raises TimeoutError.
+    Use ``call(name, ..., timeout=...)`` for another timeout, or ``submit(name, ...)``
+    to get a ``concurrent.futures.Future`` that can be cancelled.
+
+    Usage: ``with SyncVisionCraftClient(api_key) as client: client.generate_image(...)``
+
+    :param api_key: Your VisionCraft API key
+    :param timeout: Maximum duration of a blocking call, in seconds (None to wait indefinitely)
+    :param client_options: Keyword arguments for the VisionCraftClient
+    """
+
+    def __init__(self,
+                 api_key: str,
+                 timeout: Optional[float] = None,
+                 **client_options) -> None:
+        self.timeout = timeout
+        self.__loop = asyncio.new_event_loop()
+        self.__thread = threading.Thread(target=self.__loop.run_forever,
+                                         name='VisionCraftClient',
+                                         daemon=True)
+        self.__thread.start()
+        self.__client = VisionCraftClient(api_key, **client_options)
+        self.__closed = False
+        self.run(self.__client.start())
+
+    @property
+    def client(self) -> VisionCraftClient:
+        """The async client (only use it on ``loop``)."""
+        return self.__client
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The background event loop."""
+        return self.__loop
+
+    @property
+    def closed(self) -> bool:
+        return self.__closed
+
+    def __enter__(self) -> "SyncVisionCraftClient":
+        return self
+
+    def __exit__(self, *args, **kwargs) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the connection pool and stop the background event loop."""
+        if self.__closed:
+            return
+        self.__closed = True
+        try:
+            asyncio.run_coroutine_threadsafe(self.__client.close(), self.__loop).result()
+        finally:
+            self.__loop.call_soon_threadsafe(self.__loop.stop)
+            self.__thread.join()
+            self.__loop.close()
+
+    def run(self,
+            awaitable: Awaitable,
+            timeout: Optional[float] = ...) -> Any:
+        """
+        Run an awaitable on the background loop and wait for its result.
+
+        The context variables of the calling thread (e.g. ``request_context``) are
+        passed to the awaitable. If the wait times out or is interrupted
+        (KeyboardInterrupt), the awaitable is cancelled.
+
+        :param awaitable: A coroutine or another awaitable
+        :param timeout: Maximum time to wait, in seconds (default: the client's timeout)
+        """
+        future = self.__schedule(awaitable)
+        try:
+            return future.result(self.timeout if timeout is ... else timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def __schedule(self,
+                   awaitable: Awaitable) -> Future:
+        if self.__closed:
+            if inspect.iscoroutine(awaitable):
+                awaitable.close()
+            raise RuntimeError('The client is closed')
+        if threading.current_thread() is self.__thread:
+            raise RuntimeError('Blocking calls cannot be made from the client\'s event loop')
+        # The callback scheduling the task copies the context of the calling thread
+        return asyncio.run_coroutine_threadsafe(self.__ensure_coroutine(awaitable), self.__loop)
+
+    @staticmethod
+    async def __ensure_coroutine(awaitable: Awaitable) -> Any:
+        return await awaitable
+
+    def __method(self,
+                 name: str) -> Callable:
+        method = getattr(self.__client, name)
+
+        async def call(*args, **kwargs):
+            result = method(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        return call
+
+    def submit(self,
+               name: str,
+               *args,
+               **kwargs) -> Future:
+        """
+        Start a client method without waiting for it.
+
+        :param name: The name of a VisionCraftClient method (e.g. "generate_image")
+        :return: A concurrent.futures.Future, ``future.cancel()`` cancels the call
+        """
+        return self.__schedule(self.__method(name)(*args, **kwargs))
+
+    def call(self,
+             name: str,
+             *args,
+             timeout: Optional[float] = ...,
+             **kwargs) -> Any:
+        """
+        Call a client method with a specific timeout.
+
+        :param name: The name of a VisionCraftClient method (e.g. "generate_image")
+        :param timeout: Maximum time to wait, in seconds (default: the client's timeout)
+        """
+        return self.__invoke(name, args, kwargs, timeout)
+
+    def __invoke(self,
+                 name: str,
+                 args: tuple,
+                 kwargs: dict,
+                 timeout: Optional[float]) -> Any:
+        result = self.run(self.__method(name)(*args, **kwargs), timeout=timeout)
+        if hasattr(result, '__anext__'):
+            return SyncIterator(self, result)
+        return result
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_'):
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        method = getattr(VisionCraftClient, name, None)
+        if not callable(method):
+            return getattr(self.__client, name)
+
+        @wraps(method)
+        def call(*args, **kwargs):
+            return self.__invoke(name, args, kwargs, ...)
+        return call
+
+    def __dir__(self) -> list[str]:
+        return sorted({*super().__dir__(),
+                       *(name for name in dir(VisionCraftClient) if not name.startswith('_'))})
@@ -1,3 +1,20 @@
 from .checker import ExceptionChecker
+from .rate_limiter import RateLimiter, TokenBucket
+from .retry import RetryPolicy
+from .task_poller import MidjourneyPoller
+from .llm_stream import LLMStream
+from .cache import TTLCache, SingleFlight
+from .disk_cache import DiskCache
+from .json_codec import JSONCodec, OrjsonCodec, MsgspecCodec, default_codec
+from .uploads import Base64JSONPayload
+from .image_preprocessor import ImagePreprocessor, PreprocessReport, read_image_header
+from .downloader import ResultDownloader
+from .batch import BatchResult, run_batch
+from .pipeline import Pipeline, PipelineItem, image_pipeline
+from .scheduler import RequestScheduler, request_context
+from .adaptive_limiter import AdaptiveLimiter, Lease
+from .tracing import Tracer, TraceHook, RequestTrace, MetricsRegistry
+from .offload import Offloader, LoopLagMonitor
+from .task_journal import MidjourneyJournal, JournalEntry
 
 checker = ExceptionChecker()
\ No newline at end of file
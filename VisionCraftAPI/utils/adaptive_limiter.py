@@ -0,0 +1,209 @@
+import time
+import asyncio
+
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from urllib.parse import urlsplit
+from aiohttp import ClientConnectionError
+
+from ..exceptions import HTTPError, RateLimitExceeded
+
+class _Window:
+    """Concurrency window of one endpoint."""
+
+    def __init__(self,
+                 limit: float) -> None:
+        self.limit = limit
+        self.in_flight = 0
+        self.waiters: deque[asyncio.Future] = deque()
+        self.baseline: Optional[float] = None
+        self.last_decrease = 0.0
+        self.increases = 0
+        self.decreases = 0
+
+    @property
+    def size(self) -> int:
+        return max(1, int(self.limit))
+
+    def wake(self) -> None:
+        while self.waiters and self.in_flight < self.size:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+class Lease:
+    """A slot held in a window, marking when the response starts for streamed requests."""
+
+    def __init__(self,
+                 streaming: bool) -> None:
+        self.streaming = streaming
+        self.started = time.monotonic()
+        self.first_byte: Optional[float] = None
+
+    def mark_first_byte(self) -> None:
+        """Record that the first part of the response arrived."""
+        if self.first_byte is None:
+            self.first_byte = time.monotonic()
+
+    @property
+    def latency(self) -> Optional[float]:
+        """Latency of the request: time to first byte for streamed requests (None if nothing arrived)."""
+        if not self.streaming:
+            return time.monotonic() - self.started
+        return None if self.first_byte is None else self.first_byte - self.started
+
+class AdaptiveLimiter:
+    """
+    Adaptive (AIMD) limit of requests in flight, with a separate window per endpoint.
+
+    The window grows by ``increase`` for every window's worth of successful requests
+    made while it was full, as long as their latency stays under ``latency_tolerance``
+    times the usual latency of the endpoint. It is multiplied by ``decrease`` on
+    HTTP 429/5xx responses, connection errors, timeouts and latency spikes, at most
+    once per round trip (requests started before the last cut don't cut it again).
+    For streamed requests, the latency is the time to the first event, so that the
+    time spent reading the stream isn't taken for a spike.
+
+    :param initial_limit: Initial window of every endpoint
+    :param min_limit: Smallest window
+    :param max_limit: Largest window
+    :param increase: Additive increase per window of successful requests
+    :param decrease: Multiplicative decrease factor (between 0 and 1)
+    :param latency_tolerance: A latency over this multiple of the usual latency is a spike
+    :param smoothing: Weight of a new sample in the usual latency (exponential moving average)
+    """
+
+    def __init__(self,
+                 initial_limit: int = 4,
+                 min_limit: int = 1,
+                 max_limit: int = 64,
+                 increase: float = 1,
+                 decrease: float = 0.5,
+                 latency_tolerance: float = 2,
+                 smoothing: float = 0.1) -> None:
+        self.initial_limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+        self.__windows: dict[str, _Window] = {}
+
+    def __window(self,
+                 endpoint: str) -> _Window:
+        window = self.__windows.get(endpoint)
+        if window is None:
+            window = self.__windows[endpoint] = _Window(float(self.initial_limit))
+        return window
+
+    def window(self,
+               endpoint: str) -> int:
+        """Get the current window of an endpoint path (e.g. "/generate-xl")."""
+        return self.__window(endpoint).size
+
+    @asynccontextmanager
+    async def slot(self,
+                   url: str,
+                   streaming: bool = False) -> AsyncIterator[Lease]:
+        """
+        Hold a slot of the endpoint of a URL while the block runs, and learn from its outcome.
+
+        :param url: The URL of the request
+        :param streaming: Whether the block reads a streamed response (call ``lease.mark_first_byte()`` when it starts)
+        """
+        window = self.__window(urlsplit(url).path)
+        await self.__acquire(window)
+        lease = Lease(streaming)
+        full = window.in_flight >= window.size
+        try:
+            yield lease
+        except BaseException as e:
+            self.__release(window)
+            if self.is_overload(e):
+                self.__cut(window, lease.started)
+            raise
+        self.__release(window)
+        if lease.latency is not None:
+            self.__learn(window, lease.started, lease.latency, full)
+
+    @staticmethod
+    def is_overload(exception: BaseException) -> bool:
+        """Check whether an exception means that the endpoint is overloaded."""
+        if isinstance(exception, RateLimitExceeded):
+            return True
+        if isinstance(exception, HTTPError):
+            try:
+                return int(exception.status_code) == 429 or int(exception.status_code) >= 500
+            except (TypeError, ValueError):
+                return False
+        return isinstance(exception, (ClientConnectionError, asyncio.TimeoutError))
+
+    async def __acquire(self,
+                        window: _Window) -> None:
+        if window.in_flight < window.size and not window.waiters:
+            window.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        window.waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted right before the cancellation
+                self.__release(window)
+            else:
+                window.waiters.remove(waiter)
+            raise
+
+    def __release(self,
+                  window: _Window) -> None:
+        window.in_flight -= 1
+        window.wake()
+
+    def __cut(self,
+              window: _Window,
+              started: float) -> None:
+        if started < window.last_decrease:
+            return
+        window.limit = max(self.min_limit, window.limit * self.decrease)
+        window.last_decrease = time.monotonic()
+        window.decreases += 1
+
+    def __learn(self,
+                window: _Window,
+                started: float,
+                latency: float,
+                full: bool) -> None:
+        baseline = window.baseline
+        if baseline is not None and latency > baseline * self.latency_tolerance:
+            self.__cut(window, started)
+            # A spike only moves the usual latency slowly
+            window.baseline = baseline + self.smoothing * (latency - baseline) / self.latency_tolerance
+            return
+        window.baseline = latency if baseline is None else baseline + self.smoothing * (latency - baseline)
+        if full and window.limit < self.max_limit:
+            window.limit = min(self.max_limit, window.limit + self.increase / window.size)
+            window.increases += 1
+            window.wake()
+
+    def stats(self) -> dict[str, dict]:
+        """
+        Get the state of every endpoint used so far.
+
+        :return: Window, requests in flight, queued requests, usual latency in seconds,
+                 numbers of increases and decreases, by endpoint path
+        """
+        return {
+            endpoint: {
+                "window": window.size,
+                "in_flight": window.in_flight,
+                "queued": len(window.waiters),
+                "latency": window.baseline,
+                "increases": window.increases,
+                "decreases": window.decreases
+            }
+            for endpoint, window in self.__windows.items()
+        }
@@ -0,0 +1,131 @@
+import io
+import os
+import wave
+
+from collections import Counter
+from typing import TYPE_CHECKING, Iterator
+
+from .uploads import Media
+from .. import models
+
+if TYPE_CHECKING:
+    from ..models import WhisperResult
+
+class AudioWindow:
+    """
+    Represents a window of a long audio.
+
+    :param index: Position of the window
+    :param offset: Start of the window in the audio, in seconds
+    :param duration: Length of the window, in seconds
+    :param audio: The window encoded as a WAV file
+    """
+
+    def __init__(self,
+                 index: int,
+                 offset: float,
+                 duration: float,
+                 audio: bytes) -> None:
+        self.index = index
+        self.offset = offset
+        self.duration = duration
+        self.audio = audio
+
+def split_wav(audio: Media,
+              window: float,
+              overlap: float) -> Iterator[AudioWindow]:
+    """
+    Split a WAV audio into overlapping windows.
+
+    Windows are read lazily, so only the windows in use are held in memory.
+
+    :param audio: Bytes, a memoryview, a pathlib.Path or a binary file object of a WAV audio
+    :param window: Length of a window, in seconds
+    :param overlap: Length of the overlap between two windows, in seconds
+    """
+    if isinstance(audio, str):
+        raise ValueError('Long audio mode needs the audio itself, not a URL')
+    if overlap >= window:
+        raise ValueError('The overlap must be shorter than the window')
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        audio = io.BytesIO(audio)
+    elif isinstance(audio, os.PathLike):
+        audio = os.fspath(audio)
+
+    try:
+        reader = wave.open(audio, 'rb')
+    except (wave.Error, EOFError) as e:
+        raise ValueError(f'Long audio mode supports WAV audio only ({e})') from None
+
+    with reader:
+        params = reader.getparams()
+        rate = params.framerate
+        window_frames = int(window * rate)
+        step_frames = window_frames - int(overlap * rate)
+        if step_frames < 1:
+            raise ValueError('The window must be longer than the overlap by at least one audio frame')
+        index = 0
+        for start in range(0, max(params.nframes, 1), step_frames):
+            reader.setpos(start)
+            frames = reader.readframes(window_frames)
+            buffer = io.BytesIO()
+            with wave.open(buffer, 'wb') as writer:
+                writer.setparams(params)
+                writer.writeframes(frames)
+            count = len(frames) // (params.sampwidth * params.nchannels)
+            yield AudioWindow(index, start / rate, count / rate, buffer.getvalue())
+            index += 1
+            if start + window_frames >= params.nframes:
+                break
+
+def merge_whisper_results(windows: list[tuple[AudioWindow, "WhisperResult"]],
+                          overlap: float) -> "WhisperResult":
+    """
+    Merge the results of overlapping windows into a single WhisperResult.
+
+    Segment times are shifted by the window offset. In an overlap, a segment is
+    kept by the window where its midpoint lies before the middle of the overlap.
+
+    :param windows: Windows with their results, in audio order
+    :param overlap: Length of the overlap between two windows, in seconds
+    """
+    segments = models.SegmentTable()
+    for position, (window, result) in enumerate(windows):
+        lower = window.offset + overlap / 2 if position > 0 else float('-inf')
+        upper = (windows[position + 1][0].offset + overlap / 2
+                 if position + 1 < len(windows) else float('inf'))
+        for segment in result.segments.rows():
+            start = segment["start"] + window.offset
+            end = segment["end"] + window.offset
+            if not lower <= (start + end) / 2 < upper:
+                continue
+            segments.append({
+                **segment,
+                "id": len(segments),
+                "seek": segment["seek"] + round(window.offset * 100),
+                "start": start,
+                "end": end
+            })
+
+    results = [result for _, result in windows]
+    statuses = [result.inference_status for result in results]
+    last = windows[-1][0]
+
+    def total(values):
+        values = [value for value in values if value is not None]
+        return sum(values) if values else None
+
+    return models.WhisperResult.model_construct(
+        request_id=','.join(result.request_id for result in results),
+        inference_status=models.InferenceStatus.model_construct(
+            status=statuses[-1].status,
+            runtime_ms=sum(status.runtime_ms for status in statuses),
+            cost=sum(status.cost for status in statuses),
+            tokens_generated=total(status.tokens_generated for status in statuses),
+            tokens_input=total(status.tokens_input for status in statuses)
+        ),
+        text=''.join(segments.texts).strip(),
+        segments=segments,
+        language=Counter(result.language for result in results).most_common(1)[0][0],
+        input_length_ms=round((last.offset + last.duration) * 1000)
+    )
@@ -0,0 +1,82 @@
+import asyncio
+
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Optional
+
+class BatchResult:
+    """
+    Represents the outcome of one job of a batch.
+
+    :param index: Position of the job in the input
+    :param request: Keyword arguments of the job
+    :param result: The result of the job (None if it failed)
+    :param exception: The exception raised by the job (None if it succeeded)
+    """
+
+    def __init__(self,
+                 index: int,
+                 request: dict,
+                 result: Any = None,
+                 exception: Optional[Exception] = None) -> None:
+        self.index = index
+        self.request = request
+        self.result = result
+        self.exception = exception
+
+    @property
+    def ok(self) -> bool:
+        """Whether the job succeeded."""
+        return self.exception is None
+
+    def __repr__(self) -> str:
+        outcome = f'result={self.result!r}' if self.ok else f'exception={self.exception!r}'
+        return f'BatchResult(index={self.index}, {outcome})'
+
+async def run_batch(call: Callable[..., Awaitable[Any]],
+                    requests: Iterable[dict],
+                    concurrency: int = 4,
+                    ordered: bool = False) -> AsyncIterator[BatchResult]:
+    """
+    Run many jobs with at most ``concurrency`` of them in flight.
+
+    Jobs are taken from ``requests`` lazily. A failed job doesn't stop the others.
+
+    :param call: A coroutine function called with the keyword arguments of each job
+    :param requests: Keyword arguments of the jobs
+    :param concurrency: Maximum number of jobs in flight
+    :param ordered: Yield results in input order instead of completion order
+    """
+    async def run(index: int, request: dict) -> BatchResult:
+        try:
+            return BatchResult(index, request, result=await call(**request))
+        except Exception as e:
+            return BatchResult(index, request, exception=e)
+
+    jobs = enumerate(requests)
+    in_flight: set[asyncio.Task] = set()
+    finished: dict[int, BatchResult] = {}
+    next_index = 0
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(in_flight) < concurrency:
+                job = next(jobs, None)
+                if job is None:
+                    exhausted = True
+                else:
+                    in_flight.add(asyncio.ensure_future(run(*job)))
+            if not in_flight:
+                break
+            done, in_flight = await asyncio.wait(in_flight,
+                                                 return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=lambda task: task.result().index):
+                result = task.result()
+                if not ordered:
+                    yield result
+                    continue
+                finished[result.index] = result
+                while next_index in finished:
+                    yield finished.pop(next_index)
+                    next_index += 1
+    finally:
+        for task in in_flight:
+            task.cancel()
@@ -0,0 +1,127 @@
+import time
+import asyncio
+
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+class SingleFlight:
+    """
+    Shares one call between concurrent callers using the same key.
+
+    Every caller receives the same result or exception.
+    """
+
+    def __init__(self) -> None:
+        self.__in_flight: dict[Hashable, asyncio.Future] = {}
+
+    @property
+    def in_flight(self) -> int:
+        """Number of calls in flight."""
+        return len(self.__in_flight)
+
+    async def run(self,
+                  key: Hashable,
+                  call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run a call or join the one already in flight for the key.
+
+        :param key: A call key
+        :param call: A coroutine function making the call
+        """
+        while True:
+            future = self.__in_flight.get(key)
+            if future is None:
+                return await self.__call(key, call)
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Retry if the caller that was making the call got cancelled
+                if not future.cancelled():
+                    raise
+
+    async def __call(self,
+                     key: Hashable,
+                     call: Callable[[], Awaitable[Any]]) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self.__in_flight[key] = future
+        try:
+            value = await call()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody else waits for it
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            if self.__in_flight.get(key) is future:
+                del self.__in_flight[key]
+
+    def forget(self,
+               key: Optional[Hashable] = None) -> None:
+        """
+        Let the next caller start a new call instead of joining the one in flight.
+
+        :param key: A call key (None for every key)
+        """
+        if key is None:
+            self.__in_flight.clear()
+        else:
+            self.__in_flight.pop(key, None)
+
+class TTLCache:
+    """
+    In-memory cache with a time to live and single-flight fetching.
+
+    Concurrent callers asking for the same missing key share one fetch.
+
+    :param ttl: How long a value stays cached, in seconds
+    """
+
+    def __init__(self,
+                 ttl: float) -> None:
+        self.ttl = ttl
+        self.__values: dict[Hashable, tuple[float, Any]] = {}
+        self.__single_flight = SingleFlight()
+        self.__generation = 0
+
+    async def get(self,
+                  key: Hashable,
+                  fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Get a cached value or fetch it.
+
+        :param key: A cache key
+        :param fetch: A coroutine function fetching the value on a cache miss
+        """
+        cached = self.__values.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        return await self.__single_flight.run(key, lambda: self.__fetch(key, fetch))
+
+    async def __fetch(self,
+                      key: Hashable,
+                      fetch: Callable[[], Awaitable[Any]]) -> Any:
+        generation = self.__generation
+        value = await fetch()
+        # Don't store values fetched before an invalidation
+        if generation == self.__generation:
+            self.__values[key] = (time.monotonic() + self.ttl, value)
+        return value
+
+    def invalidate(self,
+                   key: Optional[Hashable] = None) -> None:
+        """
+        Drop a cached value.
+
+        :param key: A cache key (None to drop everything)
+        """
+        self.__generation += 1
+        if key is None:
+            self.__values.clear()
+        else:
+            self.__values.pop(key, None)
+        self.__single_flight.forget(key)
@@ -0,0 +1,164 @@
+import os
+import time
+import hashlib
+import tempfile
+import threading
+
+from pathlib import Path
+from typing import Optional
+
+class DiskCache:
+    """
+    Size-bounded on-disk LRU cache for results of deterministic calls.
+
+    Entries are stored under ``<directory>/<2 hex chars>/<sha256 of the key>``.
+    The access time of an entry is updated on every hit. Once the cache grows
+    over ``max_size``, the least recently used entries are evicted until it
+    is back under 90% of ``max_size``.
+
+    The methods block on file I/O and are thread-safe, the client calls them
+    in a thread.
+
+    :param directory: A directory for the cache files
+    :param max_size: Maximum total size of the entries, in bytes (default: 1 GiB)
+    """
+
+    # Temporary files older than this are left over by an interrupted write
+    TEMP_MAX_AGE = 3600
+
+    def __init__(self,
+                 directory: str | os.PathLike,
+                 max_size: int = 1024 ** 3) -> None:
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.__lock = threading.Lock()
+        self.__size = sum(path.stat().st_size for path in self.__entries())
+
+    @property
+    def size(self) -> int:
+        """Total size of the entries, in bytes."""
+        return self.__size
+
+    def __entries(self) -> list[Path]:
+        return [path for path in self.directory.glob('??/*')
+                if path.is_file() and not path.name.endswith('.tmp')]
+
+    def path(self,
+             key: str) -> Path:
+        """Get the file path of an entry."""
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return self.directory / digest[:2] / digest
+
+    def __hit(self,
+              key: str,
+              max_age: Optional[float]) -> Optional[Path]:
+        path = self.path(key)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        if max_age is not None and time.time() - stat.st_mtime > max_age:
+            return None
+        # The access time marks the recency of an entry for the LRU eviction
+        os.utime(path, (time.time(), stat.st_mtime))
+        return path
+
+    def get(self,
+            key: str,
+            max_age: Optional[float] = None) -> Optional[bytes]:
+        """
+        Read an entry.
+
+        :param key: A cache key
+        :param max_age: Ignore entries written more than ``max_age`` seconds ago
+        """
+        path = self.__hit(key, max_age)
+        if path is None:
+            return None
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def set(self,
+            key: str,
+            value: bytes) -> None:
+        """
+        Write an entry, evicting the least recently used ones if needed.
+
+        :param key: A cache key
+        :param value: The value to store
+        """
+        if len(value) > self.max_size:
+            return
+        path = self.path(key)
+        path.parent.mkdir(exist_ok=True)
+        try:
+            previous = path.stat().st_size
+        except FileNotFoundError:
+            previous = 0
+        fd, temp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(value)
+            os.replace(temp, path)
+        except BaseException:
+            os.unlink(temp)
+            raise
+        with self.__lock:
+            self.__size += len(value) - previous
+            full = self.__size > self.max_size
+        if full:
+            self.evict()
+
+    def delete(self,
+               key: str) -> None:
+        """Delete an entry."""
+        path = self.path(key)
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            return
+        with self.__lock:
+            self.__size -= size
+
+    def evict(self) -> None:
+        """
+        Delete the least recently used entries until the cache is under 90% of ``max_size``,
+        and the temporary files of interrupted writes.
+        """
+        with self.__lock:
+            self.__sweep_temporary()
+            entries = []
+            for path in self.__entries():
+                try:
+                    entries.append((path.stat(), path))
+                except FileNotFoundError:
+                    continue
+            self.__size = sum(stat.st_size for stat, _ in entries)
+            for stat, path in sorted(entries, key=lambda entry: entry[0].st_atime):
+                if self.__size <= self.max_size * 0.9:
+                    break
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                self.__size -= stat.st_size
+
+    def __sweep_temporary(self) -> None:
+        deadline = time.time() - self.TEMP_MAX_AGE
+        for path in self.directory.glob('??/*.tmp'):
+            try:
+                if path.stat().st_mtime < deadline:
+                    path.unlink()
+            except FileNotFoundError:
+                continue
+
+    def clear(self) -> None:
+        """Delete every entry."""
+        with self.__lock:
+            for path in self.__entries():
+                path.unlink(missing_ok=True)
+            self.__size = 0
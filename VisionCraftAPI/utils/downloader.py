@@ -0,0 +1,110 @@
+import os
+import asyncio
+
+from pathlib import Path
+from typing import AsyncIterator, Optional
+from urllib.parse import unquote, urlsplit
+from aiohttp import ClientSession
+
+from .retry import RetryPolicy
+from ..exceptions import HTTPError
+
+class ResultDownloader:
+    """
+    Downloads generated results (images, GIFs) through a shared session.
+
+    :param session: An aiohttp session (the client's connection pool)
+    :param retry_policy: A RetryPolicy applied to every download
+    :param chunk_size: Size of the chunks read from the response, in bytes
+    """
+
+    def __init__(self,
+                 session: ClientSession,
+                 retry_policy: RetryPolicy,
+                 chunk_size: int = 64 * 1024) -> None:
+        self.session = session
+        self.retry_policy = retry_policy
+        self.chunk_size = chunk_size
+
+    async def iter_chunks(self,
+                          url: str) -> AsyncIterator[bytes]:
+        """Stream the body of a result in chunks (without retries)."""
+        async with self.session.get(url) as response:
+            if response.status != 200:
+                raise HTTPError(message=response.reason,
+                                status_code=response.status)
+            async for chunk in response.content.iter_chunked(self.chunk_size):
+                yield chunk
+
+    async def read(self,
+                   url: str) -> bytes:
+        """Download a result into memory."""
+        return await self.retry_policy.call(self.__read, url)
+
+    async def save(self,
+                   url: str,
+                   path: Path) -> Path:
+        """Download a result to a file."""
+        return await self.retry_policy.call(self.__save, url, path)
+
+    async def __read(self,
+                     url: str) -> bytes:
+        data = bytearray()
+        async for chunk in self.iter_chunks(url):
+            data += chunk
+        return bytes(data)
+
+    async def __save(self,
+                     url: str,
+                     path: Path) -> Path:
+        part = path.with_name(path.name + '.part')
+        try:
+            with open(part, 'wb') as f:
+                async for chunk in self.iter_chunks(url):
+                    f.write(chunk)
+            os.replace(part, path)
+        finally:
+            part.unlink(missing_ok=True)
+        return path
+
+    @staticmethod
+    def filenames(urls: list[str]) -> list[str]:
+        """Get unique file names for a list of result URLs."""
+        names = [os.path.basename(unquote(urlsplit(url).path)) for url in urls]
+        result = []
+        for index, name in enumerate(names):
+            if not name or names.count(name) > 1:
+                name = f'{index}{os.path.splitext(name)[1]}'
+            result.append(name)
+        return result
+
+    async def download_all(self,
+                           urls: list[str],
+                           dest: Optional[str | os.PathLike] = None,
+                           concurrency: int = 4) -> list[Path] | list[bytes]:
+        """
+        Download many results concurrently.
+
+        :return: File paths if ``dest`` is given, otherwise bytes, in the order of ``urls``
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        if dest is not None:
+            dest = Path(dest)
+            dest.mkdir(parents=True, exist_ok=True)
+            names = self.filenames(urls)
+
+        async def download(index: int, url: str) -> Path | bytes:
+            async with semaphore:
+                if dest is None:
+                    return await self.read(url)
+                return await self.save(url, dest / names[index])
+
+        tasks = [asyncio.ensure_future(download(index, url))
+                 for index, url in enumerate(urls)]
+        try:
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
@@ -0,0 +1,227 @@
+import io
+import os
+import struct
+
+from typing import NamedTuple, Optional
+
+from .offload import Offloader
+from .uploads import Media, read_full
+
+# Enough to reach the frame header of a JPEG after a full EXIF segment
+HEADER_SIZE = 128 * 1024
+
+# JPEG start-of-frame markers (0xC4, 0xC8 and 0xCC are other segments)
+_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+def _pillow():
+    """Import Pillow on first use (it takes a while to import)."""
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        raise ImportError('Pillow is not installed (pip install Pillow)') from None
+    return Image, ImageOps
+
+class ImageHeader(NamedTuple):
+    """Format and dimensions of an image, read from its first bytes."""
+    format: str
+    width: int
+    height: int
+
+def read_image_header(data: bytes | bytearray | memoryview) -> Optional[ImageHeader]:
+    """
+    Read the format and the dimensions of a PNG, JPEG, GIF or WebP image without decoding it.
+
+    :param data: The first bytes of the image (see ``HEADER_SIZE``)
+    :return: An ImageHeader, None if the format isn't recognized or the bytes are too short
+    """
+    data = bytes(data)
+    if data.startswith(b'\x89PNG\r\n\x1a\n') and len(data) >= 24:
+        width, height = struct.unpack('>II', data[16:24])
+        return ImageHeader('PNG', width, height)
+    if data[:6] in (b'GIF87a', b'GIF89a') and len(data) >= 10:
+        width, height = struct.unpack('<HH', data[6:10])
+        return ImageHeader('GIF', width, height)
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP' and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b'VP8 ':
+            width, height = struct.unpack('<HH', data[26:30])
+            return ImageHeader('WEBP', width & 0x3FFF, height & 0x3FFF)
+        if chunk == b'VP8L':
+            bits = int.from_bytes(data[21:25], 'little')
+            return ImageHeader('WEBP', (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+        if chunk == b'VP8X':
+            return ImageHeader('WEBP',
+                               int.from_bytes(data[24:27], 'little') + 1,
+                               int.from_bytes(data[27:30], 'little') + 1)
+        return None
+    if data[:2] == b'\xff\xd8':
+        offset = 2
+        while offset + 9 <= len(data):
+            if data[offset] != 0xFF:
+                return None
+            marker = data[offset + 1]
+            if marker == 0xFF:
+                # Fill byte
+                offset += 1
+                continue
+            if marker in _SOF_MARKERS:
+                height, width = struct.unpack('>HH', data[offset + 5:offset + 9])
+                return ImageHeader('JPEG', width, height)
+            offset += 2 + struct.unpack('>H', data[offset + 2:offset + 4])[0]
+    return None
+
+class PreprocessReport(NamedTuple):
+    """Sizes and dimensions of an image before and after preprocessing."""
+    original_size: int
+    size: int
+    original_dimensions: tuple[int, int]
+    dimensions: tuple[int, int]
+    format: str
+
+    @property
+    def bytes_saved(self) -> int:
+        """Bytes saved before base64 encoding (the upload is 4/3 of it smaller)."""
+        return self.original_size - self.size
+
+class ImagePreprocessor:
+    """
+    Shrinks images before ``image2image`` and ``image_upscaling`` upload them (``pip install Pillow``).
+
+    The dimensions are read from the first bytes of the image. An image larger than
+    ``max_dimension`` or ``min_size`` is decoded (JPEGs at a reduced scale when possible),
+    rotated according to its EXIF orientation, downsized to fit in ``max_dimension``
+    and re-encoded without metadata. Images with transparency are re-encoded as PNG.
+    The original image is kept if re-encoding doesn't make it smaller.
+
+    Other media (unknown formats, URLs) and ``image2image`` images with a mask
+    are uploaded unchanged.
+
+    :param max_dimension: Maximum width and height, in pixels (generation models use up to 1024)
+    :param format: Format of the re-encoded images ("JPEG" or "WEBP")
+    :param quality: Encoding quality (1-100)
+    :param min_size: Images within ``max_dimension`` are only re-encoded from this size, in bytes (default: 256 KiB)
+    """
+
+    def __init__(self,
+                 max_dimension: int = 1024,
+                 format: str = 'JPEG',
+                 quality: int = 90,
+                 min_size: int = 256 * 1024) -> None:
+        _pillow()
+        self.max_dimension = max_dimension
+        self.format = format.upper()
+        self.quality = quality
+        self.min_size = min_size
+        self.images = 0
+        self.processed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        """Total bytes saved so far, before base64 encoding."""
+        return self.bytes_in - self.bytes_out
+
+    def needs_processing(self,
+                         header: ImageHeader,
+                         size: int) -> bool:
+        """Check whether an image is worth decoding and re-encoding."""
+        return max(header.width, header.height) > self.max_dimension or size >= self.min_size
+
+    def process(self,
+                data: bytes | bytearray | memoryview) -> tuple[Optional[bytes], PreprocessReport]:
+        """
+        Downsize and re-encode an image (CPU-bound, can run in an executor).
+
+        :param data: The encoded image
+        :return: The new image (None if the original is smaller) and a PreprocessReport
+        """
+        Image, ImageOps = _pillow()
+        original_size = memoryview(data).nbytes
+        with Image.open(io.BytesIO(data)) as image:
+            original_dimensions = image.size
+            original_format = image.format
+            if image.format == 'JPEG':
+                # Decode at the smallest 1/2^n scale still covering max_dimension
+                image.draft('RGB', (self.max_dimension, self.max_dimension))
+            image = ImageOps.exif_transpose(image)
+        image.thumbnail((self.max_dimension, self.max_dimension), Image.Resampling.LANCZOS)
+
+        transparent = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+        output = io.BytesIO()
+        if transparent:
+            image_format = 'PNG'
+            image.save(output, image_format, optimize=True)
+        else:
+            image_format = self.format
+            if image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            image.save(output, image_format, quality=self.quality, optimize=True)
+
+        result = output.getvalue()
+        if len(result) >= original_size:
+            return None, PreprocessReport(original_size, original_size,
+                                          original_dimensions, original_dimensions, original_format)
+        return result, PreprocessReport(original_size, len(result),
+                                        original_dimensions, image.size, image_format)
+
+    async def prepare(self,
+                      media: Media,
+                      offload: Optional[Offloader] = None) -> tuple[Media, Optional[PreprocessReport]]:
+        """
+        Preprocess media about to be uploaded.
+
+        :param media: Bytes, a memoryview, a pathlib.Path or a binary file object
+        :param offload: An Offloader decoding and encoding large images in an executor
+        :return: The media to upload and a PreprocessReport (None if the media was left as is)
+        """
+        header, size = self.__peek(media)
+        self.images += 1
+        if header is None or not self.needs_processing(header, size):
+            self.bytes_in += size
+            self.bytes_out += size
+            return media, None
+
+        data = self.__read(media)
+        try:
+            if offload is None:
+                result, report = self.process(data)
+            else:
+                result, report = await offload.run(len(data), self.process, data)
+        except OSError:
+            # Not decodable by Pillow, the API decides
+            result, report = None, None
+
+        self.bytes_in += size
+        if result is None:
+            self.bytes_out += size
+            return media, report
+        self.processed += 1
+        self.bytes_out += len(result)
+        return result, report
+
+    @staticmethod
+    def __peek(media: Media) -> tuple[Optional[ImageHeader], int]:
+        if isinstance(media, (bytes, bytearray, memoryview)):
+            view = memoryview(media).cast('B')
+            return read_image_header(view[:HEADER_SIZE]), view.nbytes
+        if isinstance(media, os.PathLike):
+            with open(media, 'rb') as file:
+                return read_image_header(file.read(HEADER_SIZE)), os.path.getsize(media)
+        position = media.tell()
+        head = read_full(media, HEADER_SIZE)
+        end = media.seek(0, os.SEEK_END)
+        media.seek(position)
+        return read_image_header(head), end - position
+
+    @staticmethod
+    def __read(media: Media) -> bytes | memoryview:
+        if isinstance(media, (bytes, bytearray, memoryview)):
+            return media
+        if isinstance(media, os.PathLike):
+            with open(media, 'rb') as file:
+                return file.read()
+        position = media.tell()
+        data = media.read()
+        media.seek(position)
+        return data
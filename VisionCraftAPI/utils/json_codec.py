@@ -0,0 +1,80 @@
+import json
+
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+class JSONCodec:
+    """
+    Serializes request bodies and parses response bodies.
+
+    The base class uses the stdlib ``json`` module. Subclass it and pass an
+    instance as ``json_codec`` to the client to plug in another library.
+    """
+
+    name = 'json'
+
+    def encode(self,
+               obj: Any) -> bytes:
+        """Serialize an object to UTF-8 JSON bytes."""
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def decode(self,
+               data: bytes | bytearray | memoryview | str) -> Any:
+        """Parse JSON bytes or a string."""
+        return json.loads(data)
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}()'
+
+class OrjsonCodec(JSONCodec):
+    """JSON codec using orjson (``pip install orjson``)."""
+
+    name = 'orjson'
+
+    def __init__(self) -> None:
+        if orjson is None:
+            raise ImportError('orjson is not installed')
+
+    def encode(self,
+               obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def decode(self,
+               data: bytes | bytearray | memoryview | str) -> Any:
+        return orjson.loads(data)
+
+class MsgspecCodec(JSONCodec):
+    """JSON codec using msgspec (``pip install msgspec``)."""
+
+    name = 'msgspec'
+
+    def __init__(self) -> None:
+        if msgspec is None:
+            raise ImportError('msgspec is not installed')
+        self.__encoder = msgspec.json.Encoder()
+        self.__decoder = msgspec.json.Decoder()
+
+    def encode(self,
+               obj: Any) -> bytes:
+        return self.__encoder.encode(obj)
+
+    def decode(self,
+               data: bytes | bytearray | memoryview | str) -> Any:
+        return self.__decoder.decode(data)
+
+def default_codec() -> JSONCodec:
+    """Get the fastest codec available: orjson, then msgspec, then the stdlib."""
+    if orjson is not None:
+        return OrjsonCodec()
+    if msgspec is not None:
+        return MsgspecCodec()
+    return JSONCodec()
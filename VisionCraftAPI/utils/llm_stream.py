@@ -0,0 +1,62 @@
+from typing import TYPE_CHECKING, AsyncIterator
+
+from .. import models
+
+if TYPE_CHECKING:
+    from ..models import LLMAnswer
+
+class LLMStream:
+    """
+    Async iterator over the text deltas of a streamed LLM answer.
+
+    The deltas are collected while iterating, so the full LLMAnswer
+    is available afterwards (see ``get_answer``).
+
+    :param events: An async iterator of chat completion chunks
+    """
+
+    def __init__(self,
+                 events: AsyncIterator[dict]) -> None:
+        self.__events = events
+        self.__parts: list[str] = []
+        self.role = 'assistant'
+        self.finished = False
+
+    def __aiter__(self) -> "LLMStream":
+        return self
+
+    async def __anext__(self) -> str:
+        while not self.finished:
+            try:
+                event = await self.__events.__anext__()
+            except StopAsyncIteration:
+                self.finished = True
+                break
+            choices = event.get('choices') or [{}]
+            message = choices[0].get('delta') or choices[0].get('message') or {}
+            self.role = message.get('role') or self.role
+            content = message.get('content')
+            if content:
+                self.__parts.append(content)
+                return content
+        raise StopAsyncIteration
+
+    @property
+    def content(self) -> str:
+        """The text received so far."""
+        return ''.join(self.__parts)
+
+    async def get_answer(self) -> "LLMAnswer":
+        """
+        Read the rest of the stream and assemble the answer.
+
+        :return: A LLMAnswer object
+        """
+        async for _ in self:
+            pass
+        return models.LLMAnswer(role=self.role, content=self.content)
+
+    async def aclose(self) -> None:
+        """Stop reading the stream and release the connection."""
+        self.finished = True
+        await self.__events.aclose()
@@ -0,0 +1,150 @@
+import asyncio
+import functools
+
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+class Offloader:
+    """
+    Runs CPU-heavy steps (base64 encoding of uploads, JSON parsing of responses,
+    hashing of media) in an executor when their input is large, so that they don't
+    block the other requests on the event loop.
+
+    With a thread pool, the steps still hold the GIL for a part of the time but the
+    loop gets to run between them; a process pool avoids that at the cost of copying
+    the input and the output between processes.
+
+    :param executor: A ThreadPoolExecutor or a ProcessPoolExecutor (None for the loop's default thread pool)
+    :param threshold: Minimum input size to offload, in bytes (default: 512 KiB)
+    """
+
+    def __init__(self,
+                 executor: Optional[Executor] = None,
+                 threshold: int = 512 * 1024) -> None:
+        self.executor = executor
+        self.threshold = threshold
+        self.offloaded = 0
+        self.inline = 0
+
+    @property
+    def uses_processes(self) -> bool:
+        """Whether the executor runs the steps in other processes."""
+        return isinstance(self.executor, ProcessPoolExecutor)
+
+    def should_offload(self,
+                       size: int) -> bool:
+        """Check whether an input of the given size goes to the executor."""
+        return size >= self.threshold
+
+    async def run(self,
+                  size: int,
+                  func: Callable,
+                  *args,
+                  picklable: bool = True) -> Any:
+        """
+        Call a function, in the executor if its input is over the threshold.
+
+        :param size: Size of the input, in bytes
+        :param func: The function to call
+        :param picklable: Whether the function and the arguments can be sent to another process
+                          (if not, a process pool is replaced by the loop's default thread pool)
+        """
+        if not self.should_offload(size):
+            self.inline += 1
+            return func(*args)
+        self.offloaded += 1
+        executor = self.executor
+        if self.uses_processes:
+            if not picklable:
+                executor = None
+            else:
+                # Memoryviews can't be pickled
+                args = tuple(bytes(arg) if isinstance(arg, memoryview) else arg for arg in args)
+        return await asyncio.get_running_loop().run_in_executor(executor,
+                                                                functools.partial(func, *args))
+
+class LoopLagMonitor:
+    """
+    Measures the event loop lag: how late a callback scheduled every ``interval`` seconds runs.
+
+    Usage: ``async with LoopLagMonitor() as monitor: ...`` then ``monitor.stats()``.
+
+    :param interval: Time between two measurements, in seconds
+    :param window: Number of recent measurements kept for the statistics
+    """
+
+    def __init__(self,
+                 interval: float = 0.01,
+                 window: int = 10000) -> None:
+        self.interval = interval
+        self.max_lag = 0.0
+        self.__samples: deque[float] = deque(maxlen=window)
+        self.__task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "LoopLagMonitor":
+        self.start()
+        return self
+
+    async def __aexit__(self, *args, **kwargs) -> None:
+        await self.stop()
+
+    @property
+    def running(self) -> bool:
+        return self.__task is not None and not self.__task.done()
+
+    def start(self) -> None:
+        """Start measuring on the running loop."""
+        if not self.running:
+            self.__task = asyncio.get_running_loop().create_task(self.__measure())
+
+    async def stop(self) -> None:
+        """Stop measuring (the statistics are kept)."""
+        if self.__task is not None:
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+            self.__task = None
+
+    def reset(self) -> None:
+        """Drop the measurements."""
+        self.__samples.clear()
+        self.max_lag = 0.0
+
+    async def __measure(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.__samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+    def quantile(self,
+                 q: float) -> float:
+        """
+        Get a lag quantile of the recent measurements, in seconds.
+
+        :param q: A quantile between 0 and 1 (e.g. 0.99)
+        """
+        if not self.__samples:
+            return 0.0
+        ordered = sorted(self.__samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def stats(self) -> dict[str, float]:
+        """
+        Get the lag statistics.
+
+        :return: Number of measurements, mean, p50, p99 and max lag in seconds
+        """
+        samples = len(self.__samples)
+        return {
+            "samples": samples,
+            "mean": sum(self.__samples) / samples if samples else 0.0,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "max": self.max_lag
+        }
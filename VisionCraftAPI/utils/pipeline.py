@@ -0,0 +1,253 @@
+import time
+import asyncio
+
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Optional
+
+class PipelineItem:
+    """
+    Represents one item flowing through a pipeline.
+
+    :param index: Position of the input in the requests
+    :param request: The input of the pipeline
+    :param value: The output of the last completed stage (the input before the first stage)
+    :param part: Position of the item among the outputs of an expanding stage (0 otherwise)
+    """
+
+    def __init__(self,
+                 index: int,
+                 request: Any,
+                 value: Any,
+                 part: int = 0) -> None:
+        self.index = index
+        self.request = request
+        self.value = value
+        self.part = part
+        self.stage: Optional[str] = None
+        self.exception: Optional[Exception] = None
+        self.timings: dict[str, float] = {}
+
+    @property
+    def ok(self) -> bool:
+        """Whether the item went through every stage."""
+        return self.exception is None
+
+    def derive(self,
+               value: Any,
+               part: int) -> "PipelineItem":
+        """Create an item for one of the outputs of an expanding stage."""
+        item = PipelineItem(self.index, self.request, value, part)
+        item.stage = self.stage
+        item.timings = dict(self.timings)
+        return item
+
+    def __repr__(self) -> str:
+        outcome = (f'stage={self.stage!r}' if self.ok
+                   else f'failed at {self.stage!r}, exception={self.exception!r}')
+        return f'PipelineItem(index={self.index}, part={self.part}, {outcome})'
+
+class _Stage:
+    """A named step of a pipeline with its workers."""
+
+    def __init__(self,
+                 name: str,
+                 func: Callable[[PipelineItem], Awaitable[Any]],
+                 concurrency: int,
+                 expand: bool) -> None:
+        self.name = name
+        self.func = func
+        self.concurrency = concurrency
+        self.expand = expand
+
+class _Failure:
+    """An exception of the pipeline itself (not of an item), passed to the consumer."""
+
+    def __init__(self,
+                 exception: BaseException) -> None:
+        self.exception = exception
+
+_DONE = object()
+
+class Pipeline:
+    """
+    Chain of async stages connected by bounded queues.
+
+    Every stage has its own number of workers. An item moves to the next stage as
+    soon as it is processed, so results are streamed while other items are still in
+    earlier stages, and a full queue holds back the stages before it (backpressure).
+    An item that fails in a stage skips the following stages and is yielded at once
+    with the name of the stage and the exception.
+
+    Usage: ``Pipeline().stage("double", lambda item: double(item.value), concurrency=4).run(values)``
+
+    :param buffer: Capacity of the queues between stages
+    """
+
+    def __init__(self,
+                 buffer: int = 16) -> None:
+        self.buffer = buffer
+        self.__stages: list[_Stage] = []
+
+    @property
+    def stages(self) -> list[str]:
+        """Names of the stages in order."""
+        return [stage.name for stage in self.__stages]
+
+    def stage(self,
+              name: str,
+              func: Callable[[PipelineItem], Awaitable[Any]],
+              concurrency: int = 1,
+              expand: bool = False) -> "Pipeline":
+        """
+        Add a stage.
+
+        :param name: The name of the stage
+        :param func: A coroutine function called with a PipelineItem, returning the new value of the item
+        :param concurrency: Number of items processed at the same time
+        :param expand: Whether the stage returns several values, each becoming an item of its own
+        :return: The pipeline (for chaining)
+        """
+        if concurrency < 1:
+            raise ValueError('The concurrency of a stage must be at least 1')
+        self.__stages.append(_Stage(name, func, concurrency, expand))
+        return self
+
+    async def run(self,
+                  requests: Iterable | AsyncIterable) -> AsyncIterator[PipelineItem]:
+        """
+        Run the inputs through the stages.
+
+        :param requests: The inputs (an iterable or an async iterable, read lazily)
+        :return: An async iterator of PipelineItem objects in completion order
+        """
+        if not self.__stages:
+            raise ValueError('The pipeline has no stages')
+        stages = self.__stages
+        queues = [asyncio.Queue(self.buffer) for _ in stages]
+        output: asyncio.Queue = asyncio.Queue(self.buffer)
+
+        # An exception raised by the requests, re-raised once the items read before it are yielded
+        failure: list[Exception] = []
+
+        async def feed() -> None:
+            index = 0
+            try:
+                if isinstance(requests, AsyncIterable):
+                    async for request in requests:
+                        await queues[0].put(PipelineItem(index, request, request))
+                        index += 1
+                else:
+                    for request in requests:
+                        await queues[0].put(PipelineItem(index, request, request))
+                        index += 1
+            except Exception as e:
+                failure.append(e)
+            for _ in range(stages[0].concurrency):
+                await queues[0].put(_DONE)
+
+        async def work(stage: _Stage,
+                       inbox: asyncio.Queue,
+                       outbox: asyncio.Queue) -> None:
+            while (item := await inbox.get()) is not _DONE:
+                start = time.monotonic()
+                try:
+                    value = await stage.func(item)
+                    if stage.expand:
+                        value = list(value)
+                except Exception as e:
+                    item.stage = stage.name
+                    item.exception = e
+                    await output.put(item)
+                    continue
+                item.stage = stage.name
+                item.timings[stage.name] = time.monotonic() - start
+                if not stage.expand:
+                    item.value = value
+                    await outbox.put(item)
+                    continue
+                for part, part_value in enumerate(value):
+                    await outbox.put(item.derive(part_value, part))
+
+        async def close_stage(position: int,
+                              workers: list[asyncio.Task]) -> None:
+            last = position + 1 == len(stages)
+            outbox = output if last else queues[position + 1]
+            try:
+                await asyncio.gather(*workers)
+            except Exception as e:
+                await output.put(_Failure(e))
+                return
+            for _ in range(1 if last else stages[position + 1].concurrency):
+                await outbox.put(_DONE)
+
+        tasks = [asyncio.ensure_future(feed())]
+        for position, stage in enumerate(stages):
+            outbox = output if position + 1 == len(stages) else queues[position + 1]
+            workers = [asyncio.ensure_future(work(stage, queues[position], outbox))
+                       for _ in range(stage.concurrency)]
+            tasks += workers
+            tasks.append(asyncio.ensure_future(close_stage(position, workers)))
+        try:
+            while (item := await output.get()) is not _DONE:
+                if isinstance(item, _Failure):
+                    raise item.exception
+                yield item
+            if failure:
+                raise failure[0]
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+STAGE_CONCURRENCY = {
+    "generate": 4,
+    "download": 8,
+    "upscale": 4,
+    "image2image": 4
+}
+
+def image_pipeline(client: Any,
+                   upscale_model: str,
+                   method: str = 'generate_image',
+                   resize: int = 2,
+                   image2image: Optional[dict] = None,
+                   concurrency: Optional[dict[str, int]] = None,
+                   buffer: int = 16) -> Pipeline:
+    """
+    Build the generate → download → upscale (→ image2image) pipeline.
+
+    Every generated image becomes an item of its own (``item.part``), its final
+    value is the bytes of the upscaled (or transformed) image.
+
+    :param client: A VisionCraftClient or a VisionCraftKeyPool
+    :param upscale_model: An upscale model from the list of available models
+    :param method: The generation method (generate_image or generate_xl_image)
+    :param resize: How many times to improve the images (2 or 4)
+    :param image2image: Keyword arguments of ``image2image`` (the prompt defaults to the generation prompt), None to skip the stage
+    :param concurrency: Number of items processed at the same time by stage name (see ``STAGE_CONCURRENCY``)
+    :param buffer: Capacity of the queues between stages
+    """
+    if method not in ('generate_image', 'generate_xl_image'):
+        raise ValueError(f'{method} is not a generation method')
+    concurrency = {**STAGE_CONCURRENCY, **(concurrency or {})}
+
+    async def generate(item: PipelineItem) -> list[str]:
+        return await getattr(client, method)(**item.request)
+
+    async def download(item: PipelineItem) -> bytes:
+        results = await client.download_results([item.value], concurrency=1)
+        return results[0]
+
+    async def upscale(item: PipelineItem) -> bytes:
+        return await client.image_upscaling(item.value, upscale_model, resize=resize)
+
+    async def transform(item: PipelineItem) -> bytes:
+        options = {"prompt": item.request.get('prompt'), **image2image}
+        return await client.image2image(item.value, **options)
+
+    pipeline = (Pipeline(buffer)
+                .stage('generate', generate, concurrency['generate'], expand=True)
+                .stage('download', download, concurrency['download'])
+                .stage('upscale', upscale, concurrency['upscale']))
+    if image2image is not None:
+        pipeline.stage('image2image', transform, concurrency['image2image'])
+    return pipeline
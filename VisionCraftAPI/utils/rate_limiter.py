@@ -0,0 +1,139 @@
+import re
+import time
+import asyncio
+
+from typing import TYPE_CHECKING, Optional
+
+from ..enums import ModelFamily
+
+if TYPE_CHECKING:
+    from ..models import RateLimits, Tiers
+
+class TokenBucket:
+    """
+    Token bucket allowing ``capacity`` calls per ``period`` seconds.
+
+    Waiting callers are served in FIFO order.
+
+    :param capacity: Maximum number of calls in a period
+    :param period: Length of the period in seconds
+    """
+
+    def __init__(self,
+                 capacity: int,
+                 period: float) -> None:
+        self.capacity = capacity
+        self.period = period
+        self.__tokens = float(capacity)
+        self.__updated = time.monotonic()
+        self.__lock = asyncio.Lock()
+
+    @property
+    def rate(self) -> float:
+        """Tokens refilled per second."""
+        return self.capacity / self.period
+
+    @property
+    def available(self) -> float:
+        """Number of tokens available right now."""
+        self.__refill()
+        return self.__tokens
+
+    def __refill(self) -> None:
+        now = time.monotonic()
+        self.__tokens = min(self.capacity,
+                            self.__tokens + (now - self.__updated) * self.rate)
+        self.__updated = now
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        async with self.__lock:
+            self.__refill()
+            while self.__tokens < 1:
+                await asyncio.sleep((1 - self.__tokens) / self.rate)
+                self.__refill()
+            self.__tokens -= 1
+
+    def drain(self, retry_after: float) -> None:
+        """Empty the bucket so that the next token appears after ``retry_after`` seconds."""
+        self.__refill()
+        self.__tokens = min(self.__tokens, 1 - retry_after * self.rate)
+
+class RateLimiter:
+    """
+    Client-side rate limiter with a token bucket per model family.
+
+    Calls above the limit are queued locally instead of being rejected by the API.
+
+    :param limits: A RateLimits object (e.g. ``(await client.get_limits()).FREE``)
+    """
+
+    UNITS = {
+        'second': 1,
+        'minute': 60,
+        'hour': 60 * 60,
+        'day': 60 * 60 * 24
+    }
+
+    def __init__(self,
+                 limits: "RateLimits") -> None:
+        self.__buckets: dict[ModelFamily, TokenBucket] = {}
+        for family in ModelFamily:
+            parsed = self.parse_limit(getattr(limits, family.value))
+            if parsed is not None:
+                self.__buckets[family] = TokenBucket(*parsed)
+
+    @classmethod
+    def from_tiers(cls,
+                   tiers: "Tiers",
+                   tier: str = 'FREE') -> "RateLimiter":
+        """
+        Create a rate limiter from a Tiers object.
+
+        :param tiers: A Tiers object returned by ``get_limits()``
+        :param tier: A tier name (FREE, TIER_1 or TIER_2)
+        """
+        return cls(getattr(tiers, tier.upper()))
+
+    @classmethod
+    def parse_limit(cls,
+                    limit: str) -> Optional[tuple[int, float]]:
+        """
+        Parse a limit like "10 requests per 1 minute" into (calls, seconds).
+
+        :return: None if the limit can't be parsed (e.g. unlimited)
+        """
+        match = re.search(r"(\d+)\D*?per\s+(\d+\s+)?(second|minute|hour|day)",
+                          limit, re.IGNORECASE)
+        if match is None:
+            return None
+        calls, count, unit = match.groups()
+        if int(calls) == 0:
+            return None
+        return int(calls), int(count or 1) * cls.UNITS[unit.lower()]
+
+    def bucket(self,
+               family: ModelFamily) -> Optional[TokenBucket]:
+        """Get the token bucket of a model family."""
+        return self.__buckets.get(family)
+
+    def available(self,
+                  family: ModelFamily) -> float:
+        """Number of calls of a model family allowed right now."""
+        bucket = self.__buckets.get(family)
+        return float('inf') if bucket is None else bucket.available
+
+    async def acquire(self,
+                      family: ModelFamily) -> None:
+        """Wait until a call of the given model family is allowed."""
+        bucket = self.__buckets.get(family)
+        if bucket is not None:
+            await bucket.acquire()
+
+    def penalize(self,
+                 family: ModelFamily,
+                 retry_after: float) -> None:
+        """Hold back calls of a model family after the API reported a rate limit."""
+        bucket = self.__buckets.get(family)
+        if bucket is not None:
+            bucket.drain(retry_after)
@@ -0,0 +1,105 @@
+import random
+import asyncio
+
+from typing import Any, Awaitable, Callable, Optional, Iterable
+from urllib.parse import urlsplit
+from aiohttp import ClientConnectionError, ClientPayloadError
+
+from ..exceptions import HTTPError, RateLimitExceeded
+
+class RetryPolicy:
+    """
+    Retry policy for API requests: exponential backoff with full jitter.
+
+    Only GET requests and explicitly opted-in endpoints are retried.
+
+    :param max_retries: Maximum number of retries per call
+    :param backoff_base: Base delay of the exponential backoff, in seconds
+    :param backoff_max: Maximum delay between two attempts, in seconds
+    :param budget: Maximum total time spent sleeping between attempts of one call, in seconds (None for no limit)
+    :param max_retry_after: Don't retry when the API asks to wait longer than this, in seconds
+    :param retry_statuses: HTTP status codes that should be retried
+    :param endpoints: Paths of non-idempotent endpoints that may be retried too (e.g. "/generate-xl")
+    """
+
+    def __init__(self,
+                 max_retries: int = 3,
+                 backoff_base: float = 0.5,
+                 backoff_max: float = 30,
+                 budget: Optional[float] = 120,
+                 max_retry_after: float = 60,
+                 retry_statuses: Iterable[int] = (429, 500, 502, 503, 504),
+                 endpoints: Iterable[str] = ()) -> None:
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.budget = budget
+        self.max_retry_after = max_retry_after
+        self.retry_statuses = frozenset(retry_statuses)
+        self.endpoints = frozenset(endpoints)
+
+    def allows(self,
+               method: str,
+               url: str,
+               idempotent: Optional[bool] = None) -> bool:
+        """Check whether a request may be retried at all."""
+        if idempotent is not None:
+            return idempotent or urlsplit(url).path in self.endpoints
+        return method.upper() == 'GET' or urlsplit(url).path in self.endpoints
+
+    def backoff(self,
+                attempt: int) -> float:
+        """Get a jittered delay before the given retry attempt (starting from 0)."""
+        return random.uniform(0, min(self.backoff_max,
+                                     self.backoff_base * 2 ** attempt))
+
+    def delay(self,
+              attempt: int,
+              exception: Exception) -> Optional[float]:
+        """
+        Get the delay before retrying after an exception.
+
+        :return: None if the exception should not be retried
+        """
+        if isinstance(exception, RateLimitExceeded):
+            if exception.retry_after > self.max_retry_after:
+                return None
+            return exception.retry_after + self.backoff(0)
+        if isinstance(exception, HTTPError):
+            try:
+                status_code = int(exception.status_code)
+            except (TypeError, ValueError):
+                return None
+            if status_code not in self.retry_statuses:
+                return None
+            return self.backoff(attempt)
+        if isinstance(exception, (ClientConnectionError,
+                                  ClientPayloadError,
+                                  asyncio.TimeoutError)):
+            return self.backoff(attempt)
+        return None
+
+    async def call(self,
+                   func: Callable[..., Awaitable[Any]],
+                   *args,
+                   on_retry: Optional[Callable[[int, Exception, float], None]] = None,
+                   **kwargs) -> Any:
+        """
+        Call a coroutine function, retrying it according to the policy.
+
+        :param on_retry: A callback receiving the attempt number, the exception and the delay before each retry
+        """
+        slept = 0.0
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                delay = self.delay(attempt, e)
+                if (delay is None
+                        or attempt == self.max_retries
+                        or (self.budget is not None and slept + delay > self.budget)):
+                    raise
+                if on_retry is not None:
+                    on_retry(attempt, e, delay)
+            await asyncio.sleep(delay)
+            slept += delay
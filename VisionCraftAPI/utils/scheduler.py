@@ -0,0 +1,190 @@
+import time
+import asyncio
+
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Iterator, Optional
+from urllib.parse import urlsplit
+
+from ..enums import Priority
+
+_priority: ContextVar[Priority] = ContextVar('priority', default=Priority.DEFAULT)
+_tenant: ContextVar[str] = ContextVar('tenant', default='default')
+
+@contextmanager
+def request_context(priority: Priority = Priority.DEFAULT,
+                    tenant: str = 'default') -> Iterator[None]:
+    """
+    Set the priority class and the tenant of the requests made inside the block.
+
+    :param priority: A priority class
+    :param tenant: A tenant name, tenants of the same priority are served in turn
+    """
+    priority_token = _priority.set(priority)
+    tenant_token = _tenant.set(tenant)
+    try:
+        yield
+    finally:
+        _priority.reset(priority_token)
+        _tenant.reset(tenant_token)
+
+class _Waiter:
+    """A request waiting for a slot."""
+
+    def __init__(self,
+                 future: asyncio.Future) -> None:
+        self.future = future
+        self.queued_at = time.monotonic()
+
+class _EndpointQueue:
+    """Slots and waiting requests of one endpoint."""
+
+    def __init__(self,
+                 limit: Optional[int]) -> None:
+        self.limit = limit
+        self.in_flight = 0
+        self.granted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.queues: dict[Priority, OrderedDict[str, deque[_Waiter]]] = {
+            priority: OrderedDict() for priority in Priority
+        }
+
+    @property
+    def queued(self) -> int:
+        return sum(len(waiters)
+                   for tenants in self.queues.values()
+                   for waiters in tenants.values())
+
+    def has_room(self) -> bool:
+        return self.limit is None or self.in_flight < self.limit
+
+    def grant(self,
+              waited: float) -> None:
+        self.in_flight += 1
+        self.granted += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+    def next_waiter(self) -> Optional[_Waiter]:
+        for tenants in self.queues.values():
+            while tenants:
+                tenant, waiters = next(iter(tenants.items()))
+                waiter = waiters.popleft()
+                # Round robin: the tenant goes to the end of its priority class
+                del tenants[tenant]
+                if waiters:
+                    tenants[tenant] = waiters
+                if not waiter.future.done():
+                    return waiter
+        return None
+
+    def remove(self,
+               waiter: _Waiter) -> None:
+        for tenants in self.queues.values():
+            for tenant, waiters in list(tenants.items()):
+                if waiter in waiters:
+                    waiters.remove(waiter)
+                    if not waiters:
+                        del tenants[tenant]
+                    return
+
+class RequestScheduler:
+    """
+    Schedules API requests with per-endpoint concurrency limits.
+
+    When an endpoint is at its limit, requests wait in a queue per priority class.
+    Higher priority classes are served first, and tenants of the same class take turns.
+    Use ``request_context`` (or ``client.request_context``) to set the priority and tenant.
+
+    :param limits: Maximum numbers of requests in flight by endpoint path (e.g. ``{"/generate-xl": 4}``)
+    :param default_limit: Limit of the endpoints missing in ``limits`` (None for no limit)
+    """
+
+    def __init__(self,
+                 limits: Optional[dict[str, int]] = None,
+                 default_limit: Optional[int] = None) -> None:
+        self.limits = dict(limits or {})
+        self.default_limit = default_limit
+        self.__endpoints: dict[str, _EndpointQueue] = {}
+
+    def __endpoint(self,
+                   endpoint: str) -> _EndpointQueue:
+        queue = self.__endpoints.get(endpoint)
+        if queue is None:
+            queue = _EndpointQueue(self.limits.get(endpoint, self.default_limit))
+            self.__endpoints[endpoint] = queue
+        return queue
+
+    @asynccontextmanager
+    async def slot(self,
+                   url: str) -> AsyncIterator[None]:
+        """Hold a slot of the endpoint of a URL while the block runs."""
+        queue = self.__endpoint(urlsplit(url).path)
+        await self.__acquire(queue)
+        try:
+            yield
+        finally:
+            self.__release(queue)
+
+    async def __acquire(self,
+                        queue: _EndpointQueue) -> None:
+        if queue.has_room() and not queue.queued:
+            queue.grant(0.0)
+            return
+        waiter = _Waiter(asyncio.get_running_loop().create_future())
+        queue.queues[_priority.get()].setdefault(_tenant.get(), deque()).append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # The slot was granted right before the cancellation
+                self.__release(queue)
+            else:
+                queue.remove(waiter)
+            raise
+
+    def __release(self,
+                  queue: _EndpointQueue) -> None:
+        queue.in_flight -= 1
+        while queue.has_room():
+            waiter = queue.next_waiter()
+            if waiter is None:
+                break
+            queue.grant(time.monotonic() - waiter.queued_at)
+            waiter.future.set_result(None)
+
+    def queue_depth(self,
+                    endpoint: Optional[str] = None) -> int:
+        """
+        Get the number of waiting requests.
+
+        :param endpoint: An endpoint path (None for all endpoints)
+        """
+        if endpoint is not None:
+            queue = self.__endpoints.get(endpoint)
+            return 0 if queue is None else queue.queued
+        return sum(queue.queued for queue in self.__endpoints.values())
+
+    def stats(self) -> dict[str, dict]:
+        """
+        Get the state of every endpoint used so far.
+
+        :return: Limit, requests in flight, queued requests (total and by priority),
+                 average and maximum wait time in seconds, by endpoint path
+        """
+        return {
+            endpoint: {
+                "limit": queue.limit,
+                "in_flight": queue.in_flight,
+                "queued": queue.queued,
+                "queued_by_priority": {
+                    priority.name: sum(len(waiters) for waiters in tenants.values())
+                    for priority, tenants in queue.queues.items()
+                },
+                "average_wait": queue.total_wait / queue.granted if queue.granted else 0.0,
+                "max_wait": queue.max_wait
+            }
+            for endpoint, queue in self.__endpoints.items()
+        }
@@ -0,0 +1,209 @@
+import os
+import time
+import hashlib
+import threading
+
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from .. import models
+
+if TYPE_CHECKING:
+    from ..models import MidjourneyResult
+
+def key_id(api_key: str) -> str:
+    """Get a short hash identifying an API key without storing it."""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+
+class JournalEntry:
+    """
+    Represents a Midjourney task recorded in a journal.
+
+    :param task_id: The ID of the task
+    :param prompt: The prompt of the task
+    :param key_id: Hash of the API key the task was created with (see ``key_id``)
+    :param submitted_at: Submission time (a ``time.time()`` value)
+    :param result: The final MidjourneyResult (None while the task is pending)
+    """
+
+    def __init__(self,
+                 task_id: int,
+                 prompt: str,
+                 key_id: str,
+                 submitted_at: float,
+                 result: Optional["MidjourneyResult"] = None) -> None:
+        self.task_id = task_id
+        self.prompt = prompt
+        self.key_id = key_id
+        self.submitted_at = submitted_at
+        self.result = result
+
+    @property
+    def pending(self) -> bool:
+        """Whether the task has no final result yet."""
+        return self.result is None
+
+    def __repr__(self) -> str:
+        return f'JournalEntry(task_id={self.task_id}, pending={self.pending})'
+
+class MidjourneyJournal:
+    """
+    Append-only SQLite journal of submitted Midjourney tasks and their final results.
+
+    Every submission and every final result is appended as an event and committed
+    before the call returns, so a worker that restarts can find the tasks it was
+    waiting for (``pending()``) and resume polling instead of submitting the prompts again.
+    Finished tasks are kept until ``prune()`` deletes them.
+
+    Every call blocks on SQLite (and fsync), the client runs them in a thread.
+
+    :param path: Path of the SQLite database file
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            key_id TEXT NOT NULL,
+            prompt TEXT,
+            result TEXT,
+            recorded_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS events_task ON events (task_id, kind);
+        CREATE INDEX IF NOT EXISTS events_prompt ON events (key_id, prompt);
+    """
+
+    def __init__(self,
+                 path: str | os.PathLike) -> None:
+        import sqlite3
+
+        self.path = path
+        # The client may run on another thread than the one creating the journal
+        self.__connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.__lock = threading.Lock()
+        with self.__lock:
+            self.__connection.execute('PRAGMA journal_mode=WAL')
+            self.__connection.execute('PRAGMA synchronous=FULL')
+            self.__connection.executescript(self.SCHEMA)
+
+    def close(self) -> None:
+        """Close the database."""
+        with self.__lock:
+            self.__connection.close()
+
+    def __append(self,
+                 task_id: int,
+                 kind: str,
+                 key_id: str,
+                 prompt: Optional[str] = None,
+                 result: Optional[str] = None) -> None:
+        with self.__lock:
+            self.__connection.execute(
+                'INSERT INTO events (task_id, kind, key_id, prompt, result, recorded_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (task_id, kind, key_id, prompt, result, time.time())
+            )
+
+    def record_submitted(self,
+                         task_id: int,
+                         prompt: str,
+                         api_key: str) -> None:
+        """
+        Record a submitted task.
+
+        :param task_id: The ID of the task
+        :param prompt: The prompt of the task
+        :param api_key: The API key the task was created with (only its hash is stored)
+        """
+        self.__append(task_id, 'submitted', key_id(api_key), prompt=prompt)
+
+    def record_result(self,
+                      task_id: int,
+                      result: "MidjourneyResult") -> None:
+        """
+        Record the final result of a task (once).
+
+        :param task_id: The ID of the task
+        :param result: The final MidjourneyResult
+        """
+        entry = self.get(task_id)
+        if entry is not None and not entry.pending:
+            return
+        self.__append(task_id, 'finished', entry.key_id if entry else '',
+                      result=result.model_dump_json())
+
+    def __entries(self,
+                  where: str = '',
+                  parameters: tuple = ()) -> list[JournalEntry]:
+        with self.__lock:
+            rows = self.__connection.execute(
+                'SELECT s.task_id, s.prompt, s.key_id, s.recorded_at, '
+                '(SELECT f.result FROM events f WHERE f.task_id = s.task_id AND f.kind = \'finished\' LIMIT 1) '
+                'FROM events s WHERE s.kind = \'submitted\' ' + where + ' ORDER BY s.id',
+                parameters
+            ).fetchall()
+        return [JournalEntry(task_id=task_id,
+                             prompt=prompt,
+                             key_id=key,
+                             submitted_at=submitted_at,
+                             result=None if result is None else models.MidjourneyResult.model_validate_json(result))
+                for task_id, prompt, key, submitted_at, result in rows]
+
+    def get(self,
+            task_id: int) -> Optional[JournalEntry]:
+        """Get the entry of a task (None if it isn't in the journal)."""
+        entries = self.__entries('AND s.task_id = ?', (task_id,))
+        return entries[-1] if entries else None
+
+    def entries(self) -> list[JournalEntry]:
+        """Get all recorded tasks in submission order."""
+        return self.__entries()
+
+    def pending(self,
+                api_key: Optional[str] = None) -> list[JournalEntry]:
+        """
+        Get the tasks without a final result, in submission order.
+
+        :param api_key: Only the tasks created with this API key (None for all)
+        """
+        where = ('AND NOT EXISTS (SELECT 1 FROM events f '
+                 'WHERE f.task_id = s.task_id AND f.kind = \'finished\')')
+        if api_key is None:
+            return self.__entries(where)
+        return self.__entries(where + ' AND s.key_id = ?', (key_id(api_key),))
+
+    def find_pending(self,
+                     prompt: str,
+                     api_key: str,
+                     exclude: Iterable[int] = ()) -> Optional[JournalEntry]:
+        """
+        Get the oldest pending task created with a prompt and an API key.
+
+        :param prompt: The prompt of the task
+        :param api_key: The API key the task was created with
+        :param exclude: IDs of tasks to skip (e.g. already resumed)
+        """
+        exclude = set(exclude)
+        entries = self.__entries('AND s.key_id = ? AND s.prompt = ? AND NOT EXISTS (SELECT 1 FROM events f '
+                                 'WHERE f.task_id = s.task_id AND f.kind = \'finished\')',
+                                 (key_id(api_key), prompt))
+        for entry in entries:
+            if entry.task_id not in exclude:
+                return entry
+        return None
+
+    def prune(self,
+              older_than: float = 0) -> int:
+        """
+        Delete the events of finished tasks.
+
+        :param older_than: Only the tasks finished at least this many seconds ago
+        :return: Number of deleted events
+        """
+        with self.__lock:
+            cursor = self.__connection.execute(
+                'DELETE FROM events WHERE task_id IN '
+                '(SELECT task_id FROM events WHERE kind = \'finished\' AND recorded_at <= ?)',
+                (time.time() - older_than,)
+            )
+        return cursor.rowcount
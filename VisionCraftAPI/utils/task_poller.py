@@ -0,0 +1,204 @@
+import asyncio
+
+from datetime import datetime
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional
+
+from ..enums import TaskStatus
+from .retry import RetryPolicy
+
+if TYPE_CHECKING:
+    from ..models import MidjourneyResult
+
+def is_finished(result: "MidjourneyResult") -> bool:
+    """Check whether a task has reached its final state."""
+    return result.Status == TaskStatus.SUCCESS or (result.Status != TaskStatus.GENERATING
+                                                   and result.FinishTime is not None)
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    """Parse a timestamp of the API (e.g. "2024-01-01 00:00:00")."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+def running_time(result: "MidjourneyResult") -> Optional[float]:
+    """
+    Get how long a task has been running on the API's clock (``RequestTime - StartTime``).
+
+    :return: Seconds, None if the task hasn't started or the timestamps are missing
+    """
+    start = _parse_time(result.StartTime)
+    request = _parse_time(result.RequestTime)
+    if start is None or request is None:
+        return None
+    try:
+        return max(0.0, (request - start).total_seconds())
+    except TypeError:
+        # One timestamp has a timezone and the other doesn't
+        return None
+
+class _PolledTask:
+    """State of a single task watched by the poller."""
+
+    def __init__(self,
+                 task_id: int,
+                 future: asyncio.Future,
+                 now: float) -> None:
+        self.task_id = task_id
+        self.future = future
+        self.waiters = 0
+        self.next_poll = now
+        self.started_at: Optional[float] = None
+        self.running_time: Optional[float] = None
+        self.errors = 0
+
+class MidjourneyPoller:
+    """
+    Polls many Midjourney tasks from a single scheduler.
+
+    Queued tasks (without ``StartTime``) are polled every ``max_interval`` seconds.
+    Once a task has started, the interval is a quarter of its running time,
+    bounded by ``min_interval`` and ``max_interval``. The running time comes from
+    ``StartTime`` and ``RequestTime`` (the API's clock), or from the time the start
+    was first seen when they are missing.
+
+    A failed status request that the retry policy considers transient (5xx, 429,
+    connection errors, timeouts) is retried after its backoff; a task only fails
+    after more than ``retry_policy.max_retries`` consecutive errors.
+
+    :param fetch: A coroutine function returning the MidjourneyResult of a task ID
+    :param concurrency: Maximum number of status requests in flight
+    :param min_interval: Minimum delay between two polls of a task, in seconds
+    :param max_interval: Maximum delay between two polls of a task, in seconds
+    :param retry_policy: A RetryPolicy classifying failed polls (default: backoff from ``min_interval`` to ``max_interval``)
+    """
+
+    def __init__(self,
+                 fetch: Callable[[int], Awaitable["MidjourneyResult"]],
+                 concurrency: int = 10,
+                 min_interval: float = 2,
+                 max_interval: float = 15,
+                 retry_policy: Optional[RetryPolicy] = None) -> None:
+        self.fetch = fetch
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.retry_policy = retry_policy or RetryPolicy(backoff_base=min_interval,
+                                                        backoff_max=max_interval,
+                                                        budget=None)
+        self.__semaphore = asyncio.Semaphore(concurrency)
+        self.__tasks: dict[int, _PolledTask] = {}
+        self.__wakeup = asyncio.Event()
+        self.__runner: Optional[asyncio.Task] = None
+        self.__polls: set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        """Number of tasks being polled."""
+        return len(self.__tasks)
+
+    def watch(self,
+              task_id: int) -> asyncio.Future:
+        """
+        Start polling a task.
+
+        :return: A future resolved with the final MidjourneyResult
+        """
+        loop = asyncio.get_running_loop()
+        task = self.__tasks.get(task_id)
+        if task is None:
+            task = _PolledTask(task_id, loop.create_future(), loop.time())
+            self.__tasks[task_id] = task
+            self.__wakeup.set()
+        task.waiters += 1
+        if self.__runner is None or self.__runner.done():
+            self.__runner = loop.create_task(self.__run())
+        return task.future
+
+    def unwatch(self,
+                task_id: int) -> None:
+        """Stop polling a task once nobody waits for it anymore."""
+        task = self.__tasks.get(task_id)
+        if task is not None:
+            task.waiters -= 1
+            if task.waiters <= 0:
+                del self.__tasks[task_id]
+
+    def interval(self,
+                 task: _PolledTask,
+                 now: float) -> float:
+        """Get the delay before the next poll of a task."""
+        if task.started_at is None:
+            return self.max_interval
+        if task.running_time is not None:
+            # Running time reported by the API at the last poll
+            running = task.running_time + now - task.started_at
+        else:
+            running = now - task.started_at
+        return min(self.max_interval,
+                   max(self.min_interval, running / 4))
+
+    async def __run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self.__tasks:
+            self.__wakeup.clear()
+            now = loop.time()
+            for task in list(self.__tasks.values()):
+                if task.next_poll <= now:
+                    task.next_poll = float('inf')
+                    poll = loop.create_task(self.__poll(task))
+                    self.__polls.add(poll)
+                    poll.add_done_callback(self.__polls.discard)
+            next_poll = min((task.next_poll for task in self.__tasks.values()),
+                            default=float('inf'))
+            timeout = None if next_poll == float('inf') else max(0, next_poll - now)
+            try:
+                await asyncio.wait_for(self.__wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def __poll(self,
+                     task: _PolledTask) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            async with self.__semaphore:
+                if self.__tasks.get(task.task_id) is not task:
+                    return
+                result = await self.fetch(task.task_id)
+        except Exception as e:
+            delay = self.retry_policy.delay(task.errors, e)
+            task.errors += 1
+            if delay is None or task.errors > self.retry_policy.max_retries:
+                self.__finish(task, exception=e)
+                return
+            task.next_poll = loop.time() + delay
+            self.__wakeup.set()
+            return
+
+        now = loop.time()
+        task.errors = 0
+        if is_finished(result):
+            self.__finish(task, result=result)
+            return
+        if result.StartTime is not None:
+            running = running_time(result)
+            if running is not None or task.started_at is None:
+                # started_at is then the local time matching running_time
+                task.started_at = now
+                task.running_time = running
+        task.next_poll = now + self.interval(task, now)
+        self.__wakeup.set()
+
+    def __finish(self,
+                 task: _PolledTask,
+                 result: Optional["MidjourneyResult"] = None,
+                 exception: Optional[Exception] = None) -> None:
+        if self.__tasks.get(task.task_id) is task:
+            del self.__tasks[task.task_id]
+        if not task.future.done():
+            if exception is not None:
+                task.future.set_exception(exception)
+            else:
+                task.future.set_result(result)
+        self.__wakeup.set()
@@ -0,0 +1,248 @@
+import time
+import bisect
+
+from typing import Optional
+from urllib.parse import urlsplit
+from aiohttp import TraceConfig
+
+class RequestTrace:
+    """
+    Timeline of a single request.
+
+    Timestamps are ``time.monotonic()`` values (None if the phase didn't happen,
+    e.g. no DNS lookup or connection for a reused connection).
+
+    :param method: The HTTP method
+    :param url: The request URL
+    """
+
+    def __init__(self,
+                 method: str,
+                 url: str) -> None:
+        self.method = method
+        self.url = url
+        self.endpoint = urlsplit(url).path
+        self.start = time.monotonic()
+        self.queued_end: Optional[float] = None
+        self.dns_start: Optional[float] = None
+        self.dns_end: Optional[float] = None
+        self.connect_start: Optional[float] = None
+        self.connect_end: Optional[float] = None
+        self.headers_sent: Optional[float] = None
+        self.response_start: Optional[float] = None
+        self.end: Optional[float] = None
+        self.connection_reused = False
+        self.request_size = 0
+        self.response_size = 0
+        self.status: Optional[int] = None
+        self.exception: Optional[BaseException] = None
+
+    @staticmethod
+    def __span(start: Optional[float],
+               end: Optional[float]) -> Optional[float]:
+        if start is None or end is None:
+            return None
+        return end - start
+
+    @property
+    def dns(self) -> Optional[float]:
+        """DNS resolution time, in seconds."""
+        return self.__span(self.dns_start, self.dns_end)
+
+    @property
+    def connect(self) -> Optional[float]:
+        """Connection time including the TLS handshake, in seconds."""
+        return self.__span(self.connect_start, self.connect_end)
+
+    @property
+    def time_to_first_byte(self) -> Optional[float]:
+        """Time from sending the headers to receiving the response headers, in seconds."""
+        return self.__span(self.headers_sent, self.response_start)
+
+    @property
+    def body(self) -> Optional[float]:
+        """Time spent reading the response body, in seconds."""
+        return self.__span(self.response_start, self.end)
+
+    @property
+    def total(self) -> Optional[float]:
+        """Total time of the request, in seconds."""
+        return self.__span(self.start, self.end)
+
+    def __repr__(self) -> str:
+        return (f'RequestTrace({self.method} {self.endpoint}, status={self.status}, '
+                f'total={self.total}, ttfb={self.time_to_first_byte})')
+
+class TraceHook:
+    """Base class of tracing hooks; override the methods you need."""
+
+    def on_request_end(self,
+                       trace: RequestTrace) -> None:
+        """Called when a request ends (successfully or not)."""
+
+    def on_event(self,
+                 name: str,
+                 endpoint: str,
+                 data: dict) -> None:
+        """Called on client events: "retry", "rate_limit_wait" and "preprocess"."""
+
+class MetricsRegistry(TraceHook):
+    """
+    In-process metrics: request counts, errors, sizes and latency histograms by endpoint.
+
+    :param buckets: Upper bounds of the latency histogram buckets, in seconds
+    """
+
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+    def __init__(self,
+                 buckets: tuple[float, ...] = BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.__endpoints: dict[str, dict] = {}
+
+    def __endpoint(self,
+                   endpoint: str) -> dict:
+        metrics = self.__endpoints.get(endpoint)
+        if metrics is None:
+            metrics = self.__endpoints[endpoint] = {
+                "requests": 0,
+                "errors": 0,
+                "retries": 0,
+                "rate_limit_waits": 0,
+                "preprocess_bytes_saved": 0,
+                "request_bytes": 0,
+                "response_bytes": 0,
+                "latency_sum": 0.0,
+                "histogram": [0] * (len(self.buckets) + 1),
+                "statuses": {}
+            }
+        return metrics
+
+    def on_request_end(self,
+                       trace: RequestTrace) -> None:
+        metrics = self.__endpoint(trace.endpoint)
+        metrics["requests"] += 1
+        if trace.exception is not None or (trace.status or 0) >= 400:
+            metrics["errors"] += 1
+        metrics["request_bytes"] += trace.request_size
+        metrics["response_bytes"] += trace.response_size
+        metrics["statuses"][trace.status] = metrics["statuses"].get(trace.status, 0) + 1
+        if trace.total is not None:
+            metrics["latency_sum"] += trace.total
+            metrics["histogram"][bisect.bisect_left(self.buckets, trace.total)] += 1
+
+    def on_event(self,
+                 name: str,
+                 endpoint: str,
+                 data: dict) -> None:
+        metrics = self.__endpoint(endpoint)
+        if name == 'retry':
+            metrics["retries"] += 1
+        elif name == 'rate_limit_wait':
+            metrics["rate_limit_waits"] += 1
+        elif name == 'preprocess':
+            metrics["preprocess_bytes_saved"] += data["bytes_saved"]
+
+    def quantile(self,
+                 endpoint: str,
+                 q: float) -> Optional[float]:
+        """
+        Estimate a latency quantile from the histogram (upper bound of the bucket).
+
+        :param endpoint: An endpoint path
+        :param q: A quantile between 0 and 1 (e.g. 0.99)
+        """
+        metrics = self.__endpoints.get(endpoint)
+        if metrics is None:
+            return None
+        histogram = metrics["histogram"]
+        target = q * sum(histogram)
+        seen = 0
+        for index, count in enumerate(histogram):
+            seen += count
+            if count and seen >= target:
+                return self.buckets[index] if index < len(self.buckets) else float('inf')
+        return None
+
+    def snapshot(self) -> dict[str, dict]:
+        """Get a copy of the metrics by endpoint path."""
+        return {endpoint: {**metrics,
+                           "histogram": dict(zip((*self.buckets, float('inf')),
+                                                 metrics["histogram"])),
+                           "statuses": dict(metrics["statuses"])}
+                for endpoint, metrics in self.__endpoints.items()}
+
+class Tracer:
+    """
+    Collects request timelines with an aiohttp TraceConfig and passes them to hooks.
+
+    :param hooks: TraceHook objects (e.g. a MetricsRegistry)
+    """
+
+    def __init__(self,
+                 *hooks: TraceHook) -> None:
+        self.hooks = list(hooks)
+
+    def add_hook(self,
+                 hook: TraceHook) -> None:
+        """Add a hook."""
+        self.hooks.append(hook)
+
+    def trace_config(self) -> TraceConfig:
+        """Create a TraceConfig filling the RequestTrace passed as ``trace_request_ctx``."""
+        config = TraceConfig()
+
+        def mark(attribute: str):
+            async def handler(session, context, params) -> None:
+                trace = context.trace_request_ctx
+                if isinstance(trace, RequestTrace):
+                    setattr(trace, attribute, time.monotonic())
+            return handler
+
+        async def on_reuse(session, context, params) -> None:
+            if isinstance(context.trace_request_ctx, RequestTrace):
+                context.trace_request_ctx.connection_reused = True
+
+        async def on_chunk_sent(session, context, params) -> None:
+            if isinstance(context.trace_request_ctx, RequestTrace):
+                context.trace_request_ctx.request_size += len(params.chunk)
+
+        async def on_chunk_received(session, context, params) -> None:
+            if isinstance(context.trace_request_ctx, RequestTrace):
+                context.trace_request_ctx.response_size += len(params.chunk)
+
+        async def on_request_end(session, context, params) -> None:
+            trace = context.trace_request_ctx
+            if isinstance(trace, RequestTrace):
+                trace.response_start = time.monotonic()
+                trace.status = params.response.status
+
+        config.on_connection_queued_end.append(mark('queued_end'))
+        config.on_dns_resolvehost_start.append(mark('dns_start'))
+        config.on_dns_resolvehost_end.append(mark('dns_end'))
+        config.on_connection_create_start.append(mark('connect_start'))
+        config.on_connection_create_end.append(mark('connect_end'))
+        config.on_connection_reuseconn.append(on_reuse)
+        config.on_request_headers_sent.append(mark('headers_sent'))
+        config.on_request_chunk_sent.append(on_chunk_sent)
+        config.on_response_chunk_received.append(on_chunk_received)
+        config.on_request_end.append(on_request_end)
+        return config
+
+    def finish(self,
+               trace: RequestTrace,
+               exception: Optional[BaseException] = None) -> None:
+        """Close a request timeline and pass it to the hooks."""
+        trace.end = time.monotonic()
+        trace.exception = exception
+        for hook in self.hooks:
+            hook.on_request_end(trace)
+
+    def event(self,
+              name: str,
+              url: str,
+              **data) -> None:
+        """Pass a client event to the hooks."""
+        endpoint = urlsplit(url).path
+        for hook in self.hooks:
+            hook.on_event(name, endpoint, data)
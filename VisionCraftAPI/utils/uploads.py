@@ -0,0 +1,153 @@
+import os
+import json
+import base64
+import hashlib
+
+from typing import BinaryIO, Iterator, Optional
+from aiohttp import Payload
+from aiohttp.abc import AbstractStreamWriter
+
+from .json_codec import JSONCodec
+from .offload import Offloader
+
+Media = str | bytes | bytearray | memoryview | os.PathLike | BinaryIO
+
+# A multiple of 3, so that base64-encoded chunks can be concatenated
+CHUNK_SIZE = 3 * 64 * 1024
+# Larger chunks are sent to the executor, to keep the overhead of offloading low
+OFFLOAD_CHUNK_SIZE = 16 * CHUNK_SIZE
+
+def is_inline(media: Media) -> bool:
+    """Check whether the media has to be uploaded (every str is a URL, file paths must be pathlib.Path)."""
+    return not isinstance(media, str)
+
+def read_full(file: BinaryIO,
+              size: int) -> bytes:
+    """
+    Read ``size`` bytes from a file, or less only at its end.
+
+    Raw and unbuffered streams may return fewer bytes than asked; chunks must keep
+    a multiple of 3 bytes so that their base64 encodings can be concatenated.
+    """
+    chunk = file.read(size)
+    if not chunk or len(chunk) == size:
+        return chunk
+    parts = [chunk]
+    remaining = size - len(chunk)
+    while remaining and (chunk := file.read(remaining)):
+        parts.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(parts)
+
+class Base64JSONPayload(Payload):
+    """
+    JSON request body with one field holding base64-encoded media.
+
+    The media is read and encoded chunk by chunk while the body is written,
+    so the whole encoded file is never held in memory. The body can be
+    written several times (e.g. on retries).
+
+    :param data: The JSON fields of the request
+    :param field: The name of the field holding the media
+    :param media: Bytes, a memoryview, a pathlib.Path (a str is a URL, see ``is_inline``) or a binary file object
+    :param codec: A JSONCodec serializing the other fields (stdlib ``json`` by default)
+    :param offload: An Offloader encoding and hashing large media in an executor
+    """
+
+    _autoclose = True
+
+    def __init__(self,
+                 data: dict,
+                 field: str,
+                 media: Media,
+                 codec: Optional[JSONCodec] = None,
+                 offload: Optional[Offloader] = None) -> None:
+        super().__init__(media, content_type='application/json')
+        # The media field goes first as an empty string, the encoded media is written between its quotes
+        body = (codec or JSONCodec()).encode({field: '', **data})
+        index = body.index(b'""') + 1
+        self.__prefix = body[:index]
+        self.__suffix = body[index:]
+        self.__media = media
+        self.__field = field
+        self.__data = data
+        self.__fingerprint = None
+        self.__offload = offload
+        self.__start = media.tell() if hasattr(media, 'read') else 0
+        self._size = (len(self.__prefix)
+                      + 4 * -(-self.__media_size() // 3)
+                      + len(self.__suffix))
+
+    def __media_size(self) -> int:
+        media = self.__media
+        if isinstance(media, (bytes, bytearray, memoryview)):
+            return memoryview(media).nbytes
+        if isinstance(media, os.PathLike):
+            return os.path.getsize(media)
+        position = media.tell()
+        end = media.seek(0, os.SEEK_END)
+        media.seek(position)
+        return end - self.__start
+
+    def __chunks(self,
+                 size: int = CHUNK_SIZE) -> Iterator[bytes | memoryview]:
+        media = self.__media
+        if isinstance(media, (bytes, bytearray, memoryview)):
+            view = memoryview(media).cast('B')
+            for offset in range(0, len(view), size):
+                yield view[offset:offset + size]
+        elif isinstance(media, os.PathLike):
+            with open(media, 'rb') as f:
+                while chunk := read_full(f, size):
+                    yield chunk
+        else:
+            media.seek(self.__start)
+            while chunk := read_full(media, size):
+                yield chunk
+
+    def encoded_chunks(self) -> Iterator[bytes]:
+        """Iterate over the encoded body."""
+        yield self.__prefix
+        for chunk in self.__chunks():
+            yield base64.b64encode(chunk)
+        yield self.__suffix
+
+    def fingerprint(self,
+                    exclude: tuple[str, ...] = ('token',)) -> str:
+        """
+        Get a SHA-256 hash of the fields and the media.
+
+        :param exclude: Fields left out of the hash
+        """
+        if exclude == ('token',) and self.__fingerprint is not None:
+            return self.__fingerprint
+        digest = hashlib.sha256()
+        fields = {key: value for key, value in self.__data.items() if key not in exclude}
+        digest.update(json.dumps([self.__field, fields], sort_keys=True).encode('utf-8'))
+        for chunk in self.__chunks():
+            digest.update(chunk)
+        if exclude == ('token',):
+            self.__fingerprint = digest.hexdigest()
+        return digest.hexdigest()
+
+    async def prepare_fingerprint(self) -> str:
+        """Compute the fingerprint (in the executor for large media), so that ``fingerprint()`` returns at once."""
+        if self.__offload is None or self.__fingerprint is not None:
+            return self.fingerprint()
+        return await self.__offload.run(self.size, self.fingerprint, picklable=False)
+
+    async def write(self,
+                    writer: AbstractStreamWriter) -> None:
+        if self.__offload is None or not self.__offload.should_offload(self.size):
+            for chunk in self.encoded_chunks():
+                await writer.write(chunk)
+            return
+        await writer.write(self.__prefix)
+        for chunk in self.__chunks(OFFLOAD_CHUNK_SIZE):
+            await writer.write(await self.__offload.run(len(chunk), base64.b64encode, chunk))
+        await writer.write(self.__suffix)
+
+    def decode(self,
+               encoding: str = 'utf-8',
+               errors: str = 'strict') -> str:
+        return b''.join(self.encoded_chunks()).decode(encoding, errors)
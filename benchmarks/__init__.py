@@ -0,0 +1 @@
+"""Benchmarks of the VisionCraftAPI client against a local stand-in server."""
@@ -0,0 +1,197 @@
+import json
+import random
+import asyncio
+import argparse
+import multiprocessing
+
+from aiohttp import web
+
+CATALOG_ROUTES = [
+    '/models',
+    '/models-xl',
+    '/models-llm',
+    '/models-upscale',
+    '/samplers',
+    '/samplers-xl',
+    '/loras',
+    '/loras-xl',
+    '/img2img/schedulers',
+    '/img2img/refiners'
+]
+
+LIMITS = {
+    tier: {
+        "LLM": "1000 requests per 1 minute",
+        "SD 1.X": "1000 requests per 1 minute",
+        "SDXL models": "1000 requests per 1 minute",
+        "IMG2IMG": "1000 requests per 1 minute",
+        "TEXT2GIF": "1000 requests per 1 minute",
+        "WHISPER": "1000 requests per 1 minute",
+        "Image Upscalilng": "1000 requests per 1 minute",
+        "MIDJOURNEY": "1000 requests per 1 minute"
+    }
+    for tier in ("Free Tier", "Tier 1 ($10 per month)", "Tier 2 ($25 per month)")
+}
+
+class FakeVisionCraft:
+    """
+    Local stand-in for the VisionCraft API.
+
+    :param latency: Delay before every response, in seconds
+    :param payload_size: Size of the binary responses (upscale, img2img, images), in bytes
+    :param error_rate: Share of requests answered with an error (HTTP 503 or 429)
+    :param midjourney_polls: Number of polls before a Midjourney task succeeds
+    :param whisper_segments: Number of segments in a Whisper result
+    """
+
+    def __init__(self,
+                 latency: float = 0.0,
+                 payload_size: int = 64 * 1024,
+                 error_rate: float = 0.0,
+                 midjourney_polls: int = 2,
+                 whisper_segments: int = 100) -> None:
+        self.latency = latency
+        self.payload = bytes(payload_size)
+        self.error_rate = error_rate
+        self.midjourney_polls = midjourney_polls
+        self.whisper_segments = whisper_segments
+        self.tasks: dict[int, int] = {}
+
+    async def __delay(self) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def __error(self) -> web.Response | None:
+        if self.error_rate and random.random() < self.error_rate:
+            if random.random() < 0.5:
+                return web.json_response({"detail": "Free users can generate 10 images per 1 minutes."},
+                                         status=429)
+            return web.json_response({"detail": "Service unavailable"}, status=503)
+        return None
+
+    async def catalog(self, request: web.Request) -> web.Response:
+        await self.__delay()
+        return self.__error() or web.json_response([f'item-{i}' for i in range(20)])
+
+    async def limits(self, request: web.Request) -> web.Response:
+        await self.__delay()
+        return web.Response(text=json.dumps(LIMITS), content_type='text/plain')
+
+    async def generate(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        await self.__delay()
+        images = [f'http://{request.host}/images/{i}.png' for i in range(data.get('image_count', 1))]
+        return self.__error() or web.json_response({"images": images})
+
+    async def image(self, request: web.Request) -> web.Response:
+        await self.__delay()
+        return self.__error() or web.Response(body=self.payload, content_type='image/png')
+
+    async def upload(self, request: web.Request) -> web.Response:
+        async for _ in request.content.iter_chunked(64 * 1024):
+            pass
+        await self.__delay()
+        return self.__error() or web.Response(body=self.payload, content_type='image/png')
+
+    async def whisper(self, request: web.Request) -> web.Response:
+        async for _ in request.content.iter_chunked(64 * 1024):
+            pass
+        await self.__delay()
+        segments = [{"id": i, "seek": i * 500, "start": i * 5.0, "end": i * 5.0 + 5,
+                     "text": " lorem ipsum dolor sit amet", "tokens": list(range(50000, 50020)),
+                     "temperature": 0.0, "avg_logprob": -0.2, "compression_ratio": 1.3,
+                     "no_speech_prob": 0.01}
+                    for i in range(self.whisper_segments)]
+        return self.__error() or web.json_response({
+            "request_id": "benchmark",
+            "inference_status": {"status": "succeeded", "runtime_ms": 1, "cost": 0.0,
+                                 "tokens_generated": 2000, "tokens_input": 0},
+            "text": " lorem ipsum dolor sit amet" * self.whisper_segments,
+            "segments": segments,
+            "language": "en",
+            "input_length_ms": 500000
+        })
+
+    async def midjourney(self, request: web.Request) -> web.Response:
+        await request.json()
+        await self.__delay()
+        task_id = len(self.tasks) + 1
+        self.tasks[task_id] = 0
+        return self.__error() or web.json_response({"statusCode": 200, "message": "ok", "data": task_id})
+
+    async def midjourney_result(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        await self.__delay()
+        task_id = int(data['task_id'])
+        self.tasks[task_id] = self.tasks.get(task_id, 0) + 1
+        done = self.tasks[task_id] >= self.midjourney_polls
+        return self.__error() or web.json_response({
+            "ImageID": task_id,
+            "Status": "success" if done else "generating",
+            "StartTime": "2024-01-01 00:00:00",
+            "URL": f'http://{request.host}/images/{task_id}.png' if done else None
+        })
+
+    async def chat(self, request: web.Request) -> web.StreamResponse:
+        data = await request.json()
+        await self.__delay()
+        error = self.__error()
+        if error is not None:
+            return error
+        words = ['lorem ', 'ipsum ', 'dolor ', 'sit ', 'amet'] * 20
+        if not data.get('stream'):
+            return web.json_response({"choices": [{"message": {"role": "assistant",
+                                                               "content": ''.join(words)}}]})
+        response = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+        await response.prepare(request)
+        for word in words:
+            chunk = {"choices": [{"delta": {"content": word}}]}
+            await response.write(f'data: {json.dumps(chunk)}\n\n'.encode())
+        await response.write(b'data: [DONE]\n\n')
+        return response
+
+    def app(self) -> web.Application:
+        """Create the aiohttp application."""
+        app = web.Application(client_max_size=1024 ** 3)
+        for route in CATALOG_ROUTES:
+            app.router.add_get(route, self.catalog)
+        app.router.add_get('/limits', self.limits)
+        app.router.add_get('/images/{name}', self.image)
+        for route in ('/generate', '/generate-xl', '/generate-gif'):
+            app.router.add_post(route, self.generate)
+        app.router.add_post('/img2img', self.upload)
+        app.router.add_post('/upscale', self.upload)
+        app.router.add_post('/whisper', self.whisper)
+        app.router.add_post('/midjourney', self.midjourney)
+        app.router.add_post('/midjourney/result', self.midjourney_result)
+        app.router.add_post('/v1/chat/completions', self.chat)
+        return app
+
+def serve(port: int, **options) -> None:
+    """Run the fake server until the process is stopped."""
+    web.run_app(FakeVisionCraft(**options).app(),
+                host='127.0.0.1',
+                port=port,
+                print=None,
+                handle_signals=True)
+
+def start_in_process(port: int, **options) -> multiprocessing.Process:
+    """Start the fake server in a separate process, so it doesn't skew client measurements."""
+    process = multiprocessing.Process(target=serve,
+                                      args=(port,),
+                                      kwargs=options,
+                                      daemon=True)
+    process.start()
+    return process
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a local stand-in VisionCraft API server.')
+    parser.add_argument('--port', type=int, default=8600)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--payload-size', type=int, default=64 * 1024)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    serve(args.port,
+          latency=args.latency,
+          payload_size=args.payload_size,
+          error_rate=args.error_rate)
@@ -0,0 +1,77 @@
+"""
+Measure the cold import time of the package in fresh interpreters.
+
+Usage: ``python -m benchmarks.import_time [--runs 10] [--budget 250]``
+
+For every statement, the report shows the median and best import time over
+the runs and which heavy dependencies were loaded. With ``--budget``, the
+script exits with status 1 if a median is over the budget (in milliseconds).
+"""
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+from typing import Optional
+
+STATEMENTS = [
+    'import VisionCraftAPI',
+    'from VisionCraftAPI.enums import ModelFamily',
+    'from VisionCraftAPI import VisionCraftClient',
+    'from VisionCraftAPI import VisionCraftKeyPool',
+    'from VisionCraftAPI.models import LLMAnswer'
+]
+
+HEAVY_MODULES = ('aiohttp', 'pydantic', 'certifi', 'ssl', 'orjson', 'msgspec')
+
+PROBE = '''
+import sys, time, json
+start = time.perf_counter()
+exec({statement!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+'''
+
+def measure(statement: str,
+            runs: int) -> dict:
+    """
+    Import in ``runs`` fresh interpreters.
+
+    :return: Median and best time in milliseconds, and the heavy modules loaded
+    """
+    times = []
+    loaded: list[str] = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', PROBE.format(statement=statement,
+                                                                    heavy=HEAVY_MODULES)],
+                                check=True,
+                                capture_output=True,
+                                text=True).stdout
+        result = json.loads(output)
+        times.append(result["elapsed"] * 1000)
+        loaded = result["loaded"]
+    return {"median": statistics.median(times),
+            "best": min(times),
+            "loaded": loaded}
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Measure the cold import time of VisionCraftAPI.')
+    parser.add_argument('--runs', type=int, default=10,
+                        help='Fresh interpreters per statement (default: 10)')
+    parser.add_argument('--budget', type=float,
+                        help='Maximum median import time in milliseconds')
+    args = parser.parse_args(argv)
+
+    over_budget = False
+    print(f'{"statement":<48}{"median ms":>11}{"best ms":>10}  loaded')
+    for statement in STATEMENTS:
+        result = measure(statement, args.runs)
+        print(f'{statement:<48}{result["median"]:>11.1f}{result["best"]:>10.1f}  '
+              f'{", ".join(result["loaded"]) or "-"}')
+        if args.budget is not None and result["median"] > args.budget:
+            over_budget = True
+    return 1 if over_budget else 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
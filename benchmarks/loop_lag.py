@@ -0,0 +1,115 @@
+"""
+Measure how large uploads and responses affect small calls sharing the event loop.
+
+Usage: ``python -m benchmarks.loop_lag [--upload-size 8388608] [--duration 5]``
+
+Small LLM calls run next to upscales of a large image and transcriptions with a
+large JSON result, first with everything on the loop, then with an Offloader
+using a thread pool and a process pool. The report shows the p50/p99 latency of
+the LLM calls and the event loop lag measured by a LoopLagMonitor.
+"""
+import sys
+import time
+import asyncio
+import argparse
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from VisionCraftAPI import VisionCraftClient
+from VisionCraftAPI.utils import LoopLagMonitor, Offloader
+
+from .fake_server import start_in_process
+from .run import _free_port, _wait_for_port
+
+async def measure(base_url: str,
+                  offload: Optional[Offloader],
+                  upload: bytes,
+                  duration: float,
+                  llm_workers: int,
+                  heavy_workers: int) -> dict:
+    """Run the mixed workload for ``duration`` seconds."""
+    latencies: list[float] = []
+    deadline = time.monotonic() + duration
+
+    async with VisionCraftClient('benchmark', offload=offload) as client, LoopLagMonitor() as monitor:
+        client.API_HOST = base_url
+
+        async def llm() -> None:
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                await client.llm_chatting(model='llm', messages=[{"role": "user", "content": "hi"}])
+                latencies.append(time.perf_counter() - start)
+
+        async def heavy(index: int) -> None:
+            while time.monotonic() < deadline:
+                if index % 2:
+                    await client.whisper(audio=upload, task='transcribe')
+                else:
+                    await client.image_upscaling(image=upload, model='model')
+
+        await asyncio.gather(*(llm() for _ in range(llm_workers)),
+                             *(heavy(i) for i in range(heavy_workers)))
+        lag = monitor.stats()
+
+    latencies.sort()
+    return {
+        "llm_calls": len(latencies),
+        "llm_p50": latencies[len(latencies) // 2],
+        "llm_p99": latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))],
+        "lag_p99": lag["p99"],
+        "lag_max": lag["max"]
+    }
+
+async def run(args: argparse.Namespace,
+              base_url: str) -> None:
+    upload = bytes(args.upload_size)
+    modes = {
+        "on the loop": lambda: None,
+        "thread pool": lambda: Offloader(ThreadPoolExecutor(4), threshold=args.threshold),
+        "process pool": lambda: Offloader(ProcessPoolExecutor(4), threshold=args.threshold)
+    }
+    print(f'{"mode":<14}{"LLM calls":>10}{"p50 ms":>9}{"p99 ms":>9}{"lag p99 ms":>12}{"lag max ms":>12}')
+    for mode, factory in modes.items():
+        offload = factory()
+        try:
+            result = await measure(base_url,
+                                   offload,
+                                   upload,
+                                   duration=args.duration,
+                                   llm_workers=args.llm_workers,
+                                   heavy_workers=args.heavy_workers)
+        finally:
+            if offload is not None:
+                offload.executor.shutdown()
+        print(f'{mode:<14}{result["llm_calls"]:>10}{result["llm_p50"] * 1000:>9.1f}'
+              f'{result["llm_p99"] * 1000:>9.1f}{result["lag_p99"] * 1000:>12.1f}'
+              f'{result["lag_max"] * 1000:>12.1f}', flush=True)
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Measure the event loop lag caused by large uploads and responses.')
+    parser.add_argument('--upload-size', type=int, default=8 * 1024 * 1024,
+                        help='Size of the uploaded media in bytes (default: 8 MiB)')
+    parser.add_argument('--whisper-segments', type=int, default=5000,
+                        help='Segments in a Whisper result (default: 5000)')
+    parser.add_argument('--threshold', type=int, default=512 * 1024,
+                        help='Offload threshold in bytes (default: 512 KiB)')
+    parser.add_argument('--duration', type=float, default=5,
+                        help='Duration of every mode in seconds (default: 5)')
+    parser.add_argument('--llm-workers', type=int, default=8)
+    parser.add_argument('--heavy-workers', type=int, default=4)
+    args = parser.parse_args(argv)
+
+    port = _free_port()
+    server = start_in_process(port,
+                              payload_size=1024,
+                              whisper_segments=args.whisper_segments)
+    try:
+        _wait_for_port(port)
+        asyncio.run(run(args, f'http://127.0.0.1:{port}'))
+    finally:
+        server.terminate()
+        server.join()
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
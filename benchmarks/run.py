@@ -0,0 +1,214 @@
+"""
+Drive VisionCraftClient against the local stand-in server at increasing concurrency.
+
+Usage: ``python -m benchmarks.run [--scenarios generate upscale] [--concurrency 1 8 64]``
+
+For every scenario and concurrency level, the report shows requests per second,
+p50/p99 latency, peak Python memory (tracemalloc, measured in a separate pass
+so that it doesn't inflate the timings) and client CPU time per request.
+The server runs in its own process, so its work is not counted.
+"""
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import tracemalloc
+
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from VisionCraftAPI import VisionCraftClient
+
+from .fake_server import start_in_process
+
+Call = Callable[[VisionCraftClient, int], Awaitable]
+
+async def _consume_stream(client: VisionCraftClient, i: int) -> None:
+    async for _ in client.llm_chatting_stream(model='llm', messages=[{"role": "user", "content": "hi"}]):
+        pass
+
+def scenarios(upload: bytes) -> dict[str, Call]:
+    """
+    Get the benchmark scenarios by name.
+
+    :param upload: Bytes uploaded by the img2img, upscale and whisper scenarios
+    """
+    return {
+        'catalog': lambda client, i: client.get_models(),
+        'generate': lambda client, i: client.generate_image(prompt=f'prompt {i}', model='model', sampler='sampler'),
+        'generate-xl': lambda client, i: client.generate_xl_image(prompt=f'prompt {i}', model='model', sampler='sampler'),
+        'img2img': lambda client, i: client.image2image(image=upload, prompt=f'prompt {i}',
+                                                        scheduler='scheduler', refiner='refiner'),
+        'upscale': lambda client, i: client.image_upscaling(image=upload, model='model'),
+        'whisper': lambda client, i: client.whisper(audio=upload, task='transcribe'),
+        'midjourney': lambda client, i: client.create_midjourney_task(prompt=f'prompt {i}'),
+        'midjourney-result': lambda client, i: client.get_midjourney_task(task_id=i + 1),
+        'llm': lambda client, i: client.llm_chatting(model='llm', messages=[{"role": "user", "content": "hi"}]),
+        'llm-stream': _consume_stream
+    }
+
+@dataclass
+class Result:
+    """Measurements of one scenario at one concurrency level."""
+    scenario: str
+    concurrency: int
+    requests: int
+    errors: int
+    elapsed: float
+    cpu: float
+    latencies: list[float]
+    memory_peak: Optional[int] = None
+
+    @property
+    def rps(self) -> float:
+        return self.requests / self.elapsed
+
+    def quantile(self,
+                 q: float) -> float:
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    @property
+    def cpu_per_request(self) -> float:
+        return self.cpu / self.requests
+
+    def row(self) -> str:
+        memory = '-' if self.memory_peak is None else f'{self.memory_peak / 1024 ** 2:.1f}'
+        return (f'{self.scenario:<18}{self.concurrency:>6}{self.requests:>8}{self.errors:>7}'
+                f'{self.rps:>10.0f}{self.quantile(0.5) * 1000:>10.2f}{self.quantile(0.99) * 1000:>10.2f}'
+                f'{memory:>10}{self.cpu_per_request * 1e6:>12.0f}')
+
+HEADER = (f'{"scenario":<18}{"conc":>6}{"reqs":>8}{"errors":>7}'
+          f'{"req/s":>10}{"p50 ms":>10}{"p99 ms":>10}{"peak MiB":>10}{"CPU us/req":>12}')
+
+async def _drive(client: VisionCraftClient,
+                 call: Call,
+                 requests: int,
+                 concurrency: int) -> tuple[list[float], int]:
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                await call(client, i)
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors
+
+async def measure(base_url: str,
+                  name: str,
+                  call: Call,
+                  requests: int,
+                  concurrency: int,
+                  memory: bool = True) -> Result:
+    """
+    Run one scenario at one concurrency level.
+
+    :param base_url: URL of the stand-in server
+    :param name: The scenario name
+    :param call: The scenario
+    :param requests: Number of requests
+    :param concurrency: Number of requests in flight
+    :param memory: Measure the peak memory in a second pass
+    """
+    async with VisionCraftClient('benchmark', connection_limit=max(100, concurrency)) as client:
+        client.API_HOST = base_url
+        # Warm up the connection pool
+        await _drive(client, call, min(requests, concurrency), concurrency)
+
+        cpu = time.process_time()
+        start = time.perf_counter()
+        latencies, errors = await _drive(client, call, requests, concurrency)
+        result = Result(scenario=name,
+                        concurrency=concurrency,
+                        requests=requests,
+                        errors=errors,
+                        elapsed=time.perf_counter() - start,
+                        cpu=time.process_time() - cpu,
+                        latencies=latencies)
+
+        if memory:
+            tracemalloc.start()
+            try:
+                await _drive(client, call, requests, concurrency)
+                result.memory_peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    return result
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def _wait_for_port(port: int,
+                   timeout: float = 10) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+async def run(args: argparse.Namespace,
+              base_url: str) -> list[Result]:
+    available = scenarios(bytes(args.upload_size))
+    results = []
+    print(HEADER)
+    for name in args.scenarios or available:
+        for concurrency in args.concurrency:
+            result = await measure(base_url,
+                                   name,
+                                   available[name],
+                                   requests=max(args.requests, concurrency),
+                                   concurrency=concurrency,
+                                   memory=not args.no_memory)
+            print(result.row(), flush=True)
+            results.append(result)
+    return results
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Benchmark VisionCraftClient against a local stand-in server.')
+    parser.add_argument('--scenarios', nargs='*', choices=list(scenarios(b'')),
+                        help='Scenarios to run (default: all)')
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 8, 32, 128],
+                        help='Concurrency levels (default: 1 8 32 128)')
+    parser.add_argument('--requests', type=int, default=500,
+                        help='Requests per scenario and concurrency level (default: 500)')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Server latency in seconds (default: 0)')
+    parser.add_argument('--payload-size', type=int, default=64 * 1024,
+                        help='Size of the binary responses in bytes (default: 64 KiB)')
+    parser.add_argument('--upload-size', type=int, default=256 * 1024,
+                        help='Size of the uploaded media in bytes (default: 256 KiB)')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Share of requests failing with HTTP 503 or 429 (default: 0)')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='Skip the tracemalloc pass')
+    args = parser.parse_args(argv)
+
+    port = _free_port()
+    server = start_in_process(port,
+                              latency=args.latency,
+                              payload_size=args.payload_size,
+                              error_rate=args.error_rate)
+    try:
+        _wait_for_port(port)
+        asyncio.run(run(args, f'http://127.0.0.1:{port}'))
+    finally:
+        server.terminate()
+        server.join()
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -24,4 +24,5 @@ setup(name='VisionCraftAPI',
                 'VisionCraftAPI/utils', 'VisionCraftAPI/enums'],
       
       install_requires=['certifi', 'aiohttp', 'pydantic'],
+      extras_require={'images': ['Pillow']},
       zip_safe=False)
\ No newline at end of file